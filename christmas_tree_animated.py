@@ -9,34 +9,340 @@ Enjoy! Created by AlienX (Seestar S50 enthusiast stargazer) with the support of
 AI coder on December 2025.
 """
 
+from __future__ import annotations
+
 import os
 import sys
+import io
 import random
 import math
-from pathlib import Path
-
-try:
-    from PIL import Image, ImageDraw, ImageFont, ImageFilter
-except ImportError:
-    print("Installing required package: Pillow")
-    os.system(f"{sys.executable} -m pip install Pillow --break-system-packages -q")
-    from PIL import Image, ImageDraw, ImageFont, ImageFilter
-
+import struct
+import zlib
+import time
+import glob
+import contextlib
+import functools
+import importlib
+import importlib.util
+import argparse
+import hashlib
+import json
+import mmap
+import shutil
+import subprocess
+import tempfile
+import threading
+from array import array
+from collections import OrderedDict, deque
+
+
+class _LazyModule:
+    """Stand-in for a module that is imported on first attribute access.
+
+    Pillow, NumPy and the multiprocessing machinery take most of the start-up
+    time, so commands that never draw (--help, a cache hit) do not pay for them.
+    """
+
+    def __init__(self, name: str):
+        self._name = name
+        self._module = None
+
+    def __getattr__(self, attr: str):
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return getattr(self._module, attr)
+
+    @property
+    def available(self) -> bool:
+        """Whether the module can be imported, without importing it."""
+        if self._module is not None:
+            return True
+        try:
+            return importlib.util.find_spec(self._name) is not None
+        except ModuleNotFoundError:
+            return False
+
+
+Image = _LazyModule('PIL.Image')
+ImageChops = _LazyModule('PIL.ImageChops')
+ImageDraw = _LazyModule('PIL.ImageDraw')
+ImageFont = _LazyModule('PIL.ImageFont')
+ImageFilter = _LazyModule('PIL.ImageFilter')
+PngImagePlugin = _LazyModule('PIL.PngImagePlugin')
+np = _LazyModule('numpy')  # Optional: only needed by the 'numpy' render backend
+futures = _LazyModule('concurrent.futures')
+multiprocessing = _LazyModule('multiprocessing')
+asyncio = _LazyModule('asyncio')
+urllib_request = _LazyModule('urllib.request')
+shared_memory = _LazyModule('multiprocessing.shared_memory')
+
+# Packages the renderer cannot work without: (import name, pip name)
+REQUIRED_PACKAGES = (('PIL', 'Pillow'),)
+
+
+def check_dependencies() -> list:
+    """Return the pip names of required packages that are not installed."""
+    return [package for module, package in REQUIRED_PACKAGES if not _LazyModule(module).available]
+
+
+# Render backends for lights, twinkling stars and the star glow: 'pil' draws
+# with ImageDraw, 'numpy' stamps precomputed kernels. 'auto' is PIL: the NumPy
+# stamping only pulls ahead with thousands of lights, more than a scene has.
+RENDER_BACKENDS = ('auto', 'pil', 'numpy')
+
+
+def resolve_backend(backend: str = 'auto') -> str:
+    """Return the concrete render backend ('pil' or 'numpy') for a backend name."""
+    if backend not in RENDER_BACKENDS:
+        raise ValueError(f"Unknown render backend '{backend}' (use one of {', '.join(RENDER_BACKENDS)})")
+    if backend == 'auto':
+        return 'pil'
+    if backend == 'numpy' and not np.available:
+        raise RuntimeError("The numpy render backend needs NumPy: pip install numpy")
+    return backend
+
+
+class StageProfiler:
+    """Accumulates wall time and call counts per named render stage."""
+
+    def __init__(self):
+        self.stages = OrderedDict()
+
+    def add(self, name: str, seconds: float, calls: int = 1):
+        """Record seconds spent in a stage."""
+        total, count = self.stages.get(name, (0.0, 0))
+        self.stages[name] = (total + seconds, count + calls)
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """Time the body of a with statement as one call of a stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def report(self) -> dict:
+        """Return {stage: {'seconds': total, 'calls': count}}."""
+        return {name: {'seconds': round(total, 6), 'calls': count}
+                for name, (total, count) in self.stages.items()}
+
+
+# Profiler receiving profile_stage() timings (None when not profiling)
+_profiler = None
+_NO_STAGE = contextlib.nullcontext()
+
+
+def profile_stage(name: str):
+    """Context manager timing a render stage when a profiler is active."""
+    return _profiler.stage(name) if _profiler is not None else _NO_STAGE
+
+
+@contextlib.contextmanager
+def profiling(profiler: StageProfiler):
+    """Collect the stage timings of this process into profiler within a with block.
+
+    Stages run in worker processes (frames with workers > 1, batch trees)
+    are not collected.
+    """
+    global _profiler
+    previous, _profiler = _profiler, profiler
+    try:
+        yield profiler
+    finally:
+        _profiler = previous
+
+
+def peak_rss_mb():
+    """Return the peak resident memory of this process in MB (None where unsupported)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+# Ornament image files: extensions (matched case-insensitively) and the
+# formats their headers must declare
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+IMAGE_FORMATS = ('JPEG', 'PNG')
+
+# PNG files this script writes (APNG animations, posters, sprite atlases)
+# carry this Software text, so a later scan never takes them for ornaments
+OUTPUT_SOFTWARE = 'Stargazers-XmasTree'
+OWN_OUTPUT = "written by this script"
+
+# Files found unusable as ornaments, keyed on (path, mtime, size), with the
+# reason. They are skipped without being opened again until they change.
+_rejected_images = {}
+
+
+def _file_key(image_path: str, stat: os.stat_result = None) -> tuple:
+    stat = stat or os.stat(image_path)
+    return os.path.abspath(image_path), stat.st_mtime_ns, stat.st_size
+
+
+def check_image_header(image_path: str):
+    """Return why a file cannot be an ornament, or None if its header is valid.
+
+    Only the header is parsed; the pixel data is not decoded.
+    """
+    try:
+        with Image.open(image_path) as img:
+            if img.format not in IMAGE_FORMATS:
+                return f"unsupported format {img.format}"
+            if img.width < 1 or img.height < 1:
+                return "empty image"
+            if img.info.get('Software') == OUTPUT_SOFTWARE:
+                return OWN_OUTPUT
+    except Image.UnidentifiedImageError:
+        return "not a readable image"
+    except (OSError, ValueError, Image.DecompressionBombError) as exc:
+        return str(exc) or type(exc).__name__
+    return None
+
+
+def reject_image(image_path: str, reason: str, stat: os.stat_result = None, report: bool = True) -> bool:
+    """Remember that a file is not a usable ornament.
+
+    Returns True (and reports it, if report is set) the first time.
+    """
+    try:
+        key = _file_key(image_path, stat)
+    except OSError:
+        return False
+    if key in _rejected_images:
+        return False
+    _rejected_images[key] = reason
+    if report:
+        print(f"⚠️  Skipping {os.path.basename(image_path)}: {reason}")
+    return True
+
+
+def image_rejected(image_path: str) -> bool:
+    """Return whether a file is known to be unusable in its current version."""
+    try:
+        return _file_key(image_path) in _rejected_images
+    except OSError:
+        return True
+
+
+def find_images(folder_path: str, limit: int = None, exclude: tuple = ()) -> list:
+    """Find the usable JPG and PNG images in the specified folder, in name order.
+
+    The folder is listed once, then candidates are checked by their header
+    until limit usable images are found. Links to a file already found are
+    skipped. Files that fail the check are reported once, in one summary,
+    and skipped by later scans until they change. Paths in exclude, and PNG
+    files written by this script, are ignored.
+    """
+    excluded = {os.path.abspath(path) for path in exclude}
+    with os.scandir(folder_path) as entries:
+        candidates = sorted(entry.path for entry in entries
+                            if os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+                            and entry.is_file())
 
-def find_images(folder_path: str) -> list:
-    """Find all JPG and PNG images in the specified folder."""
-    folder = Path(folder_path)
-    extensions = ['.jpg', '.jpeg', '.JPG', '.JPEG', '.png', '.PNG']
     images = []
-    for ext in extensions:
-        images.extend(folder.glob(f'*{ext}'))
-    return [str(img) for img in images]
-
-
-def create_circular_ornament(image_path: str, size: int, glow_phase: float = 0) -> Image.Image:
-    """Create a circular ornament from an image with a metallic frame and animated glow."""
-    img = Image.open(image_path).convert('RGBA')
-    img = img.resize((size, size), Image.LANCZOS)
+    seen = set()
+    rejects = []
+    for path in candidates:
+        if limit is not None and len(images) >= limit:
+            break
+        if os.path.abspath(path) in excluded:
+            continue
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        identity = (stat.st_dev, stat.st_ino) if stat.st_ino else path
+        if identity in seen or _file_key(path, stat) in _rejected_images:
+            continue
+
+        reason = check_image_header(path)
+        if reason:
+            if reject_image(path, reason, stat, report=False) and reason != OWN_OUTPUT:
+                rejects.append(f"{os.path.basename(path)} ({reason})")
+            continue
+        seen.add(identity)
+        images.append(path)
+
+    if rejects:
+        shown = ", ".join(rejects[:3]) + (f" and {len(rejects) - 3} more" if len(rejects) > 3 else "")
+        print(f"⚠️  Skipping {len(rejects)} unusable image file(s): {shown}")
+    return images
+
+
+# Memory budget for decoded ornament sources (bytes of RGBA pixel data)
+SOURCE_CACHE_BUDGET = 256 * 1024 * 1024
+
+
+def load_ornament_source(image_path: str, size: int) -> Image.Image:
+    """Decode an image and resize it to a size x size RGBA ornament source."""
+    with Image.open(image_path) as img:
+        # JPEG can decode directly at 1/2, 1/4 or 1/8 scale; ask for the
+        # smallest scale that is still at least as large as the ornament.
+        # Other formats ignore the request and decode at full size.
+        img.draft('RGB', (size, size))
+        img = img.convert('RGBA')
+    return img.resize((size, size), Image.LANCZOS, reducing_gap=3.0)
+
+
+class SourceImageCache:
+    """Decoded and resized ornament sources, evicted LRU-first by memory budget.
+
+    Entries are keyed on (path, mtime, file size, ornament size), so a file
+    that is replaced on disk is decoded again while unchanged files are
+    decoded once per run no matter how many frames use them. The loader
+    turns a path and size into the cached image.
+    """
+
+    def __init__(self, max_bytes: int = SOURCE_CACHE_BUDGET, loader=load_ornament_source):
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, image_path: str, size: int) -> Image.Image:
+        """Return the cached image for image_path at size, loading it on a miss.
+
+        Safe to call from several threads; loads run outside the lock.
+        """
+        stat = os.stat(image_path)
+        key = (image_path, stat.st_mtime_ns, stat.st_size, size)
+
+        with self._lock:
+            img = self._entries.get(key)
+            if img is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return img
+            self.misses += 1
+
+        img = self.loader(image_path, size)
+        nbytes = img.width * img.height * len(img.getbands())
+        with self._lock:
+            if nbytes <= self.max_bytes and key not in self._entries:
+                self._entries[key] = img
+                self.current_bytes += nbytes
+                while self.current_bytes > self.max_bytes:
+                    _, evicted = self._entries.popitem(last=False)
+                    self.current_bytes -= evicted.width * evicted.height * len(evicted.getbands())
+        return img
+
+    def clear(self):
+        """Drop all cached images."""
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+
+
+def load_ornament_body(image_path: str, size: int) -> Image.Image:
+    """Create the phase-independent part of an ornament: the image cut to a circle."""
+    img = load_ornament_source(image_path, size)
 
     # Create circular mask
     mask = Image.new('L', (size, size), 0)
@@ -44,61 +350,178 @@ def create_circular_ornament(image_path: str, size: int, glow_phase: float = 0)
     mask_draw.ellipse([4, 4, size-4, size-4], fill=255)
 
     # Apply circular mask
-    output = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-    output.paste(img, (0, 0))
-    output.putalpha(mask)
+    img.putalpha(mask)
+    return img
 
-    # Add metallic frame with animated glow
-    frame = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-    frame_draw = ImageDraw.Draw(frame)
 
-    # Pulsating glow intensity
-    glow_intensity = int(50 + 30 * math.sin(glow_phase))
+# Masked ornament bodies, ready to have the animated overlay composited on top
+_ornament_cache = SourceImageCache(loader=load_ornament_body)
+
+
+@functools.lru_cache(maxsize=256)
+def create_ornament_overlay(size: int, glow_intensity: int, highlight_alpha: int) -> Image.Image:
+    """Create the animated part of an ornament: golden ring, highlight and hook.
+
+    The glow values are integers, so overlays repeat across frames and
+    ornaments of the same size and are memoized. Treat the result as read-only.
+    """
+    overlay = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(overlay)
 
     # Outer golden ring with glow
     for i in range(4):
         color_val = 180 + i * 20 + glow_intensity // 2
-        frame_draw.ellipse([i, i, size-i-1, size-i-1],
-                          outline=(min(255, color_val), int(min(255, color_val)*0.8), 50, 255), width=1)
+        draw.ellipse([i, i, size-i-1, size-i-1],
+                     outline=(min(255, color_val), int(min(255, color_val)*0.8), 50, 255), width=1)
 
     # Inner ring
-    frame_draw.ellipse([3, 3, size-4, size-4],
-                      outline=(255, 215, 0, 200), width=2)
-
-    # Add highlight reflection
-    highlight = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-    highlight_draw = ImageDraw.Draw(highlight)
-    highlight_alpha = int(60 + 40 * math.sin(glow_phase + 1))
-    highlight_draw.ellipse([size//4, size//8, size//2, size//4],
-                          fill=(255, 255, 255, highlight_alpha))
+    draw.ellipse([3, 3, size-4, size-4],
+                 outline=(255, 215, 0, 200), width=2)
 
-    output = Image.alpha_composite(output, frame)
-    output = Image.alpha_composite(output, highlight)
+    # Highlight reflection (inside the ring, so it can be drawn on the same layer)
+    draw.ellipse([size//4, size//8, size//2, size//4],
+                 fill=(255, 255, 255, highlight_alpha))
 
-    # Add hanging hook
+    # Hanging hook (opaque, drawn over the ring)
     hook_size = size // 8
-    hook = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-    hook_draw = ImageDraw.Draw(hook)
-    hook_draw.ellipse([size//2 - hook_size//2, 0,
-                      size//2 + hook_size//2, hook_size],
-                     fill=(212, 175, 55, 255), outline=(180, 140, 40, 255))
-    hook_draw.arc([size//2 - hook_size//3, -hook_size//2,
-                  size//2 + hook_size//3, hook_size//2],
-                 0, 180, fill=(212, 175, 55, 255), width=2)
+    draw.ellipse([size//2 - hook_size//2, 0,
+                  size//2 + hook_size//2, hook_size],
+                 fill=(212, 175, 55, 255), outline=(180, 140, 40, 255))
+    draw.arc([size//2 - hook_size//3, -hook_size//2,
+              size//2 + hook_size//3, hook_size//2],
+             0, 180, fill=(212, 175, 55, 255), width=2)
+
+    return overlay
 
-    output = Image.alpha_composite(output, hook)
 
-    return output
+def ornament_glow(glow_phase: float) -> tuple:
+    """Return the (glow_intensity, highlight_alpha) of an image ornament at a glow phase."""
+    # Pulsating glow intensity
+    glow_intensity = int(50 + 30 * math.sin(glow_phase))
+    highlight_alpha = int(60 + 40 * math.sin(glow_phase + 1))
+    return glow_intensity, highlight_alpha
 
 
-def create_star(size: int, twinkle_phase: float = 0) -> Image.Image:
+def create_circular_ornament(image_path: str, size: int, glow_phase: float = 0) -> Image.Image:
+    """Create a circular ornament from an image with a metallic frame and animated glow."""
+    return render_circular_ornament(image_path, size, *ornament_glow(glow_phase))
+
+
+def render_circular_ornament(image_path: str, size: int, glow_intensity: int,
+                             highlight_alpha: int, cache: bool = True) -> Image.Image:
+    """Create a circular image ornament in a given glow state (see ornament_glow).
+
+    With cache=False the body and overlay are built without entering the
+    process caches, for one-off sprites too large to keep around.
+    """
+    if not cache:
+        return Image.alpha_composite(_ornament_cache.loader(image_path, size),
+                                     create_ornament_overlay.__wrapped__(size, glow_intensity, highlight_alpha))
+    body = _ornament_cache.get(image_path, size)
+    return Image.alpha_composite(body, create_ornament_overlay(size, glow_intensity, highlight_alpha))
+
+
+@functools.lru_cache(maxsize=None)
+def _disc_kernel(radius: int):
+    """Concentric discs as ImageDraw rasterizes them, as a NumPy array.
+
+    Each pixel of the (2 * radius + 1) square holds the smallest radius whose
+    disc covers it, or 0 outside the largest disc, so per-ring colours can be
+    applied with a single table lookup.
+    """
+    side = 2 * radius + 1
+    kernel = Image.new('L', (side, side), 0)
+    draw = ImageDraw.Draw(kernel)
+    for r in range(radius, 0, -1):
+        draw.ellipse([radius - r, radius - r, radius + r, radius + r], fill=r)
+    return np.asarray(kernel)
+
+
+@functools.lru_cache(maxsize=None)
+def _ellipse_mask(width: int, height: int):
+    """Filled ellipse inscribed in a width x height box, as a 0/1 NumPy array."""
+    mask = Image.new('L', (width, height), 0)
+    ImageDraw.Draw(mask).ellipse([0, 0, width - 1, height - 1], fill=1)
+    return np.asarray(mask)
+
+
+def _stamp(layer, x0: int, y0: int, kernel, table):
+    """Write table[kernel] into an RGBA array at (x0, y0) wherever kernel is non-zero.
+
+    Like ImageDraw fills, stamped pixels replace what was there. The kernel
+    is clipped to the layer edges.
+    """
+    height, width = layer.shape[:2]
+    x1, y1 = max(x0, 0), max(y0, 0)
+    x2, y2 = min(x0 + kernel.shape[1], width), min(y0 + kernel.shape[0], height)
+    if x1 >= x2 or y1 >= y2:
+        return
+    window = kernel[y1 - y0:y2 - y0, x1 - x0:x2 - x0]
+    covered = window > 0
+    layer[y1:y2, x1:x2][covered] = table[window[covered]]
+
+
+def _stamp_dots(layer, xs, ys, sizes, values):
+    """Fill a dot spanning size + 1 pixels, top-left at (x, y), for every point of an RGBA array.
+
+    Dots are set to (v, v, v, 255) as ImageDraw would fill them one after
+    the other: where dots overlap, the later one wins. All dots are
+    placed with a few vectorized passes, one per pixel of each dot shape.
+    """
+    height, width = layer.shape[:2]
+    winner = np.full((height, width), -1, np.int32)
+    ids = np.arange(len(xs), dtype=np.int32)
+    for size in np.unique(sizes):
+        group = sizes == size
+        group_x, group_y, group_ids = xs[group], ys[group], ids[group]
+        for dy, dx in zip(*np.nonzero(_ellipse_mask(int(size) + 1, int(size) + 1))):
+            x, y = group_x + dx, group_y + dy
+            inside = (x >= 0) & (x < width) & (y >= 0) & (y < height)
+            x, y, dot_ids = x[inside], y[inside], group_ids[inside]
+            winner[y, x] = np.maximum(winner[y, x], dot_ids)
+
+    covered = winner >= 0
+    brightness = np.asarray(values, np.uint8)[winner[covered]]
+    layer[covered] = np.stack([brightness, brightness, brightness,
+                               np.full_like(brightness, 255)], axis=1)
+
+
+def star_state(twinkle_phase: float) -> tuple:
+    """Return the (pulse, glow_intensity, highlight_scale) of the star at a twinkle phase."""
+    # Pulsating size, glow and center highlight
+    pulse = 1 + 0.1 * math.sin(twinkle_phase)
+    glow_intensity = 0.3 + 0.2 * math.sin(twinkle_phase)
+    highlight_scale = 1 + 0.3 * math.sin(twinkle_phase * 2)
+    return pulse, glow_intensity, highlight_scale
+
+
+def create_star(size: int, twinkle_phase: float = 0, backend: str = 'auto') -> Image.Image:
     """Create a glowing golden star with twinkling animation."""
+    return render_star(size, *star_state(twinkle_phase), backend=backend)
+
+
+def render_star(size: int, pulse: float, glow_intensity: float, highlight_scale: float,
+                backend: str = 'auto') -> Image.Image:
+    """Create the glowing golden star in a given twinkle state (see star_state).
+
+    The sprite only depends on a few whole-pixel values, so states rounding
+    to the same values (like the two halves of the loop, as the star phase
+    runs twice per loop) share one rendering. Treat it as read-only.
+    """
+    outer_radius = int((size // 2 - 5) * pulse)
+    inner_radius = int(outer_radius / 2.5)
+    glow_alphas = tuple(int(255 * (1 - glow/20) * glow_intensity) for glow in range(20, 0, -2))
+    highlight_size = int(inner_radius//2 * highlight_scale)
+    return _star_sprite(size, outer_radius, glow_alphas, highlight_size, resolve_backend(backend))
+
+
+@functools.lru_cache(maxsize=256)
+def _star_sprite(size: int, outer_radius: int, glow_alphas: tuple, highlight_size: int,
+                 backend: str) -> Image.Image:
     img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+    use_numpy = backend == 'numpy'
 
     center = size // 2
-    # Pulsating size
-    pulse = 1 + 0.1 * math.sin(twinkle_phase)
-    outer_radius = int((size // 2 - 5) * pulse)
     inner_radius = int(outer_radius / 2.5)
     points = 5
 
@@ -115,11 +538,13 @@ def create_star(size: int, twinkle_phase: float = 0) -> Image.Image:
         star_points.append((x, y))
 
     # Draw glow layers with animated intensity
-    glow_intensity = 0.3 + 0.2 * math.sin(twinkle_phase)
-    for glow in range(20, 0, -2):
-        glow_img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-        glow_draw = ImageDraw.Draw(glow_img)
-        alpha = int(255 * (1 - glow/20) * glow_intensity)
+    if use_numpy:
+        # Record for each pixel which glow polygons cover it, one bit per
+        # polygon, and composite every combination in one lookup. (The
+        # polygons are nested, but their rasterized edges are not always.)
+        covered = np.zeros((size, size), np.uint16)
+        alphas = []
+    for level, (glow, alpha) in enumerate(zip(range(20, 0, -2), glow_alphas), start=1):
 
         expanded_points = []
         for px, py in star_points:
@@ -131,16 +556,35 @@ def create_star(size: int, twinkle_phase: float = 0) -> Image.Image:
                     center + dx * (1 + glow/30),
                     center + dy * (1 + glow/30)
                 ))
+        if use_numpy:
+            if len(expanded_points) >= 3:
+                mask = Image.new('L', (size, size), 0)
+                ImageDraw.Draw(mask).polygon(expanded_points, fill=1)
+                covered |= np.asarray(mask, np.uint16) << (level - 1)
+            alphas.append(alpha)
+            continue
+
+        glow_img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
+        glow_draw = ImageDraw.Draw(glow_img)
         if len(expanded_points) >= 3:
             glow_draw.polygon(expanded_points, fill=(255, 255, 200, alpha))
         img = Image.alpha_composite(img, glow_img)
 
+    if use_numpy:
+        combinations = np.arange(1 << len(alphas))
+        coverage = np.zeros(len(combinations))
+        for level, alpha in enumerate(alphas):
+            coverage += (combinations >> level & 1) * (alpha / 255) * (1 - coverage)
+        stack = np.zeros((len(combinations), 4), np.uint8)
+        stack[:, 3] = np.round(255 * coverage)
+        stack[coverage > 0, :3] = (255, 255, 200)
+        img = Image.fromarray(stack[covered])
+
     # Draw main star
     draw = ImageDraw.Draw(img)
     draw.polygon(star_points, fill=(255, 223, 0, 255), outline=(255, 180, 0, 255))
 
     # Center highlight
-    highlight_size = int(inner_radius//2 * (1 + 0.3 * math.sin(twinkle_phase * 2)))
     draw.ellipse([center-highlight_size, center-highlight_size,
                   center+highlight_size, center+highlight_size],
                 fill=(255, 255, 220, 200))
@@ -148,31 +592,133 @@ def create_star(size: int, twinkle_phase: float = 0) -> Image.Image:
     return img
 
 
-def create_animated_lights(width: int, height: int, frame: int, positions: list) -> Image.Image:
-    """Create Christmas lights with animation."""
-    img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-    draw = ImageDraw.Draw(img)
+# Christmas light colours, cycled along the light positions
+LIGHT_COLORS = [
+    (255, 50, 50),    # Red
+    (50, 255, 50),    # Green
+    (50, 150, 255),   # Blue
+    (255, 255, 50),   # Yellow
+    (255, 50, 255),   # Magenta
+    (255, 180, 50),   # Orange
+]
+
+
+def light_state(frame: int, index: int, size: int = 4) -> tuple:
+    """Return (brightness, color, glow_size, center_color) of a light of the given size in a frame."""
+    # Each light blinks at different phase
+    phase = (frame / 3 + index * 0.7) % (2 * math.pi)
+    brightness = 0.5 + 0.5 * math.sin(phase)
+    return light_appearance(brightness, index, size)
+
+
+def light_appearance(brightness: float, index: int, size: int = 4) -> tuple:
+    """Return the light_state() of light index at a brightness between 0 and 1."""
+    base_color = LIGHT_COLORS[index % len(LIGHT_COLORS)]
+    color = tuple(int(c * brightness) for c in base_color)
 
-    colors = [
-        (255, 50, 50),    # Red
-        (50, 255, 50),    # Green
-        (50, 150, 255),   # Blue
-        (255, 255, 50),   # Yellow
-        (255, 50, 255),   # Magenta
-        (255, 180, 50),   # Orange
-    ]
+    glow_size = int(size * 3 * (0.7 + 0.3 * brightness))
+    center_color = tuple(min(255, int(c + 100 * brightness)) for c in color)
 
-    for i, (x, y) in enumerate(positions):
-        # Each light blinks at different phase
-        phase = (frame / 3 + i * 0.7) % (2 * math.pi)
-        brightness = 0.5 + 0.5 * math.sin(phase)
+    return brightness, color, glow_size, center_color
 
-        color_idx = i % len(colors)
-        base_color = colors[color_idx]
-        color = tuple(int(c * brightness) for c in base_color)
 
-        size = 4
-        glow_size = int(size * 3 * (0.7 + 0.3 * brightness))
+def create_animated_lights(width: int, height: int, frame: int, positions: list,
+                           backend: str = 'auto', size: int = 4) -> Image.Image:
+    """Create Christmas lights with animation."""
+    img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    draw_animated_lights(img, (0, 0), frame, positions, backend, size)
+    return img
+
+
+def draw_animated_lights(target: Image.Image, origin: tuple, frame: int, positions: list,
+                         backend: str = 'auto', size: int = 4):
+    """Draw the Christmas lights into a transparent target whose top-left is at origin."""
+    states = [light_state(frame, i, size) for i in range(len(positions))]
+    draw_lights(target, origin, positions, states, backend, size)
+
+
+def _stamp_lights(canvas_size: tuple, origin: tuple, positions: list, states: list, size: int):
+    """Draw lights as draw_lights does with ImageDraw, as an RGBA array.
+
+    Every light is a glow stamp (concentric discs, one alpha per ring)
+    followed by a centre stamp, and each stamp replaces the pixels under
+    it. All the stamps are scattered at once, keeping for each pixel the
+    last stamp to cover it, together with the ring of that stamp there, so
+    the cost does not depend on a Python loop over the lights. Returns the
+    array of the box the lights cover and the box's top-left corner, or
+    None if no light shows.
+    """
+    width, height = canvas_size
+    count = len(states)
+    if not count:
+        return None
+    xs = np.fromiter((x for x, _ in positions), np.int64, count) - origin[0]
+    ys = np.fromiter((y for _, y in positions), np.int64, count) - origin[1]
+    brightness = np.array([state[0] for state in states])
+    glow_sizes = np.array([state[2] for state in states], np.int64)
+
+    # Stamp 2 * i is the glow of light i and 2 * i + 1 its centre; a
+    # stamp's ring r is packed with it as key = stamp * rings + r
+    rings = int(max(glow_sizes.max(), size // 2)) + 1
+    tables = np.zeros((2 * count, rings, 4), np.uint8)
+    tables[0::2, :, :3] = np.array([state[1] for state in states], np.uint8)[:, None]
+    ring = np.arange(rings)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        glow_alpha = 80 * brightness[:, None] * (1 - ring[None, :] / glow_sizes[:, None])
+    tables[0::2, :, 3] = np.where(ring[None, :] <= glow_sizes[:, None], glow_alpha, 0).astype(np.uint8)
+    tables[1::2, :, :3] = np.array([state[3] for state in states], np.uint8)[:, None]
+    tables[1::2, :, 3] = (255 * brightness).astype(np.uint8)[:, None]
+
+    # The box of the canvas the stamps reach
+    reach = rings - 1
+    x0, y0 = max(int(xs.min()) - reach, 0), max(int(ys.min()) - reach, 0)
+    x1, y1 = min(int(xs.max()) + reach, width - 1), min(int(ys.max()) + reach, height - 1)
+    if x0 > x1 or y0 > y1:
+        return None
+    box_width, box_height = x1 - x0 + 1, y1 - y0 + 1
+    xs, ys = xs - x0, ys - y0
+    winner = np.full(box_width * box_height, -1, np.int32)
+
+    stamp_groups = [(np.flatnonzero(glow_sizes == radius), radius, 0)
+                    for radius in np.unique(glow_sizes).tolist()]
+    stamp_groups.append((np.arange(count), size // 2, 1))
+    for lights, radius, offset in stamp_groups:
+        kernel = _disc_kernel(radius)
+        dy, dx = np.nonzero(kernel)
+        key = ((2 * lights + offset) * rings).astype(np.int32)[:, None] + kernel[dy, dx]
+        dx, dy = dx - radius, dy - radius
+        # Stamps entirely on the canvas need no clipping
+        whole = ((xs[lights] + x0 >= radius) & (xs[lights] + x0 + radius < width)
+                 & (ys[lights] + y0 >= radius) & (ys[lights] + y0 + radius < height))
+        corner = ys[lights] * box_width + xs[lights]
+        np.maximum.at(winner, (corner[whole, None] + (dy * box_width + dx)).ravel(), key[whole].ravel())
+        if not whole.all():
+            x = xs[lights[~whole], None] + dx
+            y = ys[lights[~whole], None] + dy
+            inside = (x >= 0) & (x < box_width) & (y >= 0) & (y < box_height)
+            np.maximum.at(winner, (y * box_width + x)[inside], key[~whole][inside])
+
+    covered = np.flatnonzero(winner >= 0)
+    layer = np.zeros((box_width * box_height, 4), np.uint8)
+    layer[covered] = tables.reshape(-1, 4)[winner[covered]]
+    return layer.reshape(box_height, box_width, 4), (x0, y0)
+
+
+def draw_lights(target: Image.Image, origin: tuple, positions: list, states: list,
+                backend: str = 'auto', size: int = 4):
+    """Draw lights in the given light_state()s into a target whose top-left is at origin."""
+    ox, oy = origin
+
+    if resolve_backend(backend) == 'numpy':
+        stamped = _stamp_lights(target.size, origin, positions, states, size)
+        if stamped is not None:
+            layer, corner = stamped
+            target.paste(Image.fromarray(layer), corner)
+        return
+
+    draw = ImageDraw.Draw(target)
+    for (x, y), (brightness, color, glow_size, center_color) in zip(positions, states):
+        x, y = x - ox, y - oy
 
         # Glow effect
         for glow in range(glow_size, 0, -1):
@@ -181,15 +727,221 @@ def create_animated_lights(width: int, height: int, frame: int, positions: list)
             draw.ellipse([x-glow, y-glow, x+glow, y+glow], fill=glow_color)
 
         # Bright center
-        center_color = tuple(min(255, int(c + 100 * brightness)) for c in color)
         draw.ellipse([x-size//2, y-size//2, x+size//2, y+size//2],
                     fill=(*center_color, int(255 * brightness)))
 
+
+def create_twinkling_stars(width: int, height: int, star_positions: list, phase: float,
+                           backend: str = 'auto', dot: int = 3) -> Image.Image:
+    """Create the twinkling-star layer drawn over the static background stars."""
+    img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    draw_twinkling_stars(img, (0, 0), star_positions, phase, backend, dot)
     return img
 
 
+def draw_twinkling_stars(target: Image.Image, origin: tuple, star_positions: list, phase: float,
+                         backend: str = 'auto', dot: int = 3):
+    """Draw the twinkling stars into a transparent target whose top-left is at origin.
+
+    Each star is a dot spanning dot + 1 pixels.
+    """
+    brightness = [star_twinkle(base_brightness, phase, i)
+                  for i, (_, _, base_brightness) in enumerate(star_positions)]
+    draw_star_dots(target, origin, star_positions, brightness, backend, dot)
+
+
+def star_twinkle(base_brightness: int, phase: float, index: int) -> int:
+    """Return the brightness of twinkling star index at an animation phase."""
+    twinkle = math.sin(phase + index * 0.3)
+    return int(base_brightness * (0.7 + 0.3 * twinkle))
+
+
+def draw_star_dots(target: Image.Image, origin: tuple, star_positions: list, brightness: list,
+                   backend: str = 'auto', dot: int = 3):
+    """Draw star dots with the given brightness into a target whose top-left is at origin."""
+    ox, oy = origin
+    before = dot // 3
+    after = dot - before
+
+    if resolve_backend(backend) == 'numpy':
+        xs, ys = _point_columns(star_positions, 2)
+        layer = np.zeros((target.height, target.width, 4), np.uint8)
+        _stamp_dots(layer, xs - ox - before, ys - oy - before, np.full(len(xs), dot),
+                    np.asarray(brightness[:len(xs)], np.uint8))
+        target.paste(Image.fromarray(layer), (0, 0))
+        return
+
+    stars = [(x - ox, y - oy, value) for (x, y, _), value in zip(star_positions, brightness)]
+    draw = ImageDraw.Draw(target)
+    for x, y, brightness in stars:
+        draw.ellipse([x-before, y-before, x+after, y+after], fill=(brightness, brightness, brightness, 255))
+
+
+# Garland swing, in reference pixels either side of the row centre line
+GARLAND_SWING = 12
+
+
+def garland_rows(metadata: dict, phase: float) -> list:
+    """Return the garland polyline of each row for an animation phase, in canvas pixels."""
+    # Laid out in reference pixels, then scaled to the canvas
+    scene = metadata.get('scene', metadata)
+    sx, sy, _ = metadata.get('scale', (1.0, 1.0, 1.0))
+    tree_center = scene['tree_center']
+    tree_top = scene['tree_top']
+    tree_height = scene['tree_height']
+    tree_base_width = scene['tree_base_width']
+
+    rows = []
+    for row in range(1, 6):
+        y_base = tree_top + 50 + (tree_height - 100) * row // 6
+        # Apply same width multiplier: 1.0 at top to 2.0 at bottom
+        width_multiplier = 1.0 + (row / 5)
+        row_width = tree_base_width * row / 6.5 * width_multiplier
+
+        points = []
+        for i in range(15):
+            x = tree_center - row_width//2 + (row_width * i / 14)
+            y = y_base + math.sin(i * 0.8 + phase) * GARLAND_SWING
+            points.append((x * sx, y * sy))
+        rows.append(points)
+
+    return rows
+
+
+def garland_sparkles(frame_num: int, phase: float, count: int = 14) -> list:
+    """Return the sparkle alpha at each of the first count points of a garland row (0: no sparkle)."""
+    # Animated sparkles
+    return [int(150 + 100 * math.sin(phase + i)) if (i + frame_num) % 3 == 0 else 0
+            for i in range(count)]
+
+
+def draw_garland(target: Image.Image, origin: tuple, metadata: dict, frame_num: int, phase: float):
+    """Draw the garland with sparkle animation into a target whose top-left is at origin."""
+    _, _, s = metadata.get('scale', (1.0, 1.0, 1.0))
+    draw_garland_rows(target, origin, garland_rows(metadata, phase), garland_sparkles(frame_num, phase), s)
+
+
+def draw_garland_rows(target: Image.Image, origin: tuple, rows: list, sparkles: list, s: float = 1.0):
+    """Draw garland polylines and their sparkles into a target whose top-left is at origin."""
+    ox, oy = origin
+    line_width = scaled_size(2, s)
+    sparkle = scaled_size(3, s)
+    garland_draw = ImageDraw.Draw(target)
+
+    for points in rows:
+        points = [(x - ox, y - oy) for x, y in points]
+        for i in range(len(points) - 1):
+            garland_draw.line([points[i], points[i+1]],
+                            fill=(255, 215, 0, 150), width=line_width)
+            sparkle_alpha = sparkles[i]
+            if sparkle_alpha:
+                garland_draw.ellipse([points[i][0]-sparkle, points[i][1]-sparkle,
+                                     points[i][0]+sparkle, points[i][1]+sparkle],
+                                    fill=(255, 255, 200, sparkle_alpha))
+
+
+class LayerBuffer:
+    """Reusable transparent RGBA buffer for an animated layer, covering only its box."""
+
+    def __init__(self, box: tuple):
+        self.box = box
+        self.origin = box[:2]
+        self.image = Image.new('RGBA', (box[2] - box[0], box[3] - box[1]), (0, 0, 0, 0))
+
+    def clear(self):
+        """Make the buffer fully transparent again."""
+        self.image.paste((0, 0, 0, 0), (0, 0) + self.image.size)
+
+    def composite_onto(self, img: Image.Image):
+        """Alpha-composite the buffer onto its box of img, in place."""
+        img.alpha_composite(self.image, dest=self.origin)
+
+
+# Layer buffers of each thread that renders frames, reused from frame to frame
+_layer_buffers = threading.local()
+
+
+def layer_buffers() -> dict:
+    """Return the layer buffers of the calling thread, by layer name."""
+    buffers = getattr(_layer_buffers, 'buffers', None)
+    if buffers is None:
+        buffers = _layer_buffers.buffers = {}
+    return buffers
+
+
+def _layer_buffer(buffers: dict, name: str, box: tuple) -> LayerBuffer:
+    """Return a cleared buffer for a layer, reusing the previous frame's if the box is unchanged."""
+    buffer = buffers.get(name)
+    if buffer is None or buffer.box != box:
+        buffer = buffers[name] = LayerBuffer(box)
+    else:
+        buffer.clear()
+    return buffer
+
+
+def _points_box(points, margin_before: int, margin_after: int, width: int, height: int):
+    """Bounding box of points grown by the given margins and clipped to the canvas, or None."""
+    if not len(points):
+        return None
+    if isinstance(points, PointArray):
+        xs, ys = points.columns[:2]
+    else:
+        xs = [p[0] for p in points]
+        ys = [p[1] for p in points]
+    box = (max(0, int(math.floor(min(xs))) - margin_before),
+           max(0, int(math.floor(min(ys))) - margin_before),
+           min(width, int(math.ceil(max(xs))) + margin_after),
+           min(height, int(math.ceil(max(ys))) + margin_after))
+    if box[0] >= box[2] or box[1] >= box[3]:
+        return None
+    return box
+
+
+def animated_layer_boxes(metadata: dict, static_layers: dict, width: int, height: int) -> dict:
+    """Canvas boxes that contain everything each animated layer can draw in any frame.
+
+    Layers whose content would fall entirely off the canvas map to None.
+    """
+    sx, sy, s = scene_scale(width, height)
+
+    # Snowflakes fall between 25 reference pixels above and 24 below their rest position
+    snow_corners = []
+    for x, y, snowflake in static_layers['snowflakes']:
+        snow_corners.append((x, y + int(-25 * sy)))
+        snow_corners.append((x + snowflake.width, y + int(24 * sy) + snowflake.height))
+
+    # Garland points swing around the row centre line
+    swing = GARLAND_SWING * sy
+    garland_points = []
+    for row in garland_rows(metadata, 0):
+        garland_points.extend((x, y + dy) for x, y in row for dy in (-2 * swing, 2 * swing))
+    garland_margin = scaled_size(3, s) + scaled_size(2, s) + 1
+
+    dot = star_dot_size(s)
+    light_reach = 3 * scaled_size(SCENE['light_size'], s)
+
+    return {
+        'stars': _points_box(metadata['star_positions'][:SCENE['twinkling_stars']],
+                             dot // 3, dot - dot // 3 + 1, width, height),
+        'snow': _points_box(snow_corners, 0, 1, width, height),
+        'lights': _points_box(metadata['light_positions'], light_reach, light_reach + 1, width, height),
+        'garland': _points_box(garland_points, garland_margin, garland_margin + 1, width, height),
+    }
+
+
+def snowflake_offset(frame_num: int, index: int, sy: float = 1.0) -> int:
+    """Vertical offset of a snowflake from its rest position in a frame (gentle falling motion)."""
+    return int(((frame_num * 2 + index * 20) % 50 - 25) * sy)
+
+
+def star_dot_size(s: float) -> int:
+    """Extent in pixels of a twinkling-star dot at size scale s."""
+    return scaled_size(3, s)
+
+
+@functools.lru_cache(maxsize=64)
 def create_snowflake(size: int) -> Image.Image:
-    """Create a decorative snowflake."""
+    """Create a decorative snowflake (shared between callers, treat as read-only)."""
     img = Image.new('RGBA', (size, size), (0, 0, 0, 0))
     draw = ImageDraw.Draw(img)
 
@@ -214,112 +966,188 @@ def create_snowflake(size: int) -> Image.Image:
     return img
 
 
-def create_base_tree(width: int, height: int) -> tuple:
-    """Create the static base elements of the tree. Returns image and metadata."""
+class PointArray:
+    """Compact column store of points, with one typed array per field.
 
-    img = Image.new('RGBA', (width, height), (0, 0, 0, 255))
-    draw = ImageDraw.Draw(img)
+    Items read back as tuples, so a PointArray stands in for a list of
+    tuples (iteration, indexing, slicing, len). Bulk consumers read whole
+    columns instead, as typed arrays or as NumPy arrays without copying.
+    """
+
+    __slots__ = ('fields', 'columns')
+
+    def __init__(self, fields: tuple, typecodes: str, rows=()):
+        self.fields = tuple(fields)
+        self.columns = tuple(array(typecode) for typecode in typecodes)
+        for row in rows:
+            self.append(row)
+
+    def append(self, row: tuple):
+        for column, value in zip(self.columns, row):
+            column.append(value)
 
-    # Gradient background (night sky)
-    for y in range(height):
-        ratio = y / height
-        r = int(5 + ratio * 10)
-        g = int(10 + ratio * 20)
-        b = int(30 + ratio * 40)
-        draw.line([(0, y), (width, y)], fill=(r, g, b, 255))
+    def column(self, field: str) -> array:
+        """Return the typed array of one field."""
+        return self.columns[self.fields.index(field)]
+
+    def as_numpy(self, field: str):
+        """Return one field as a NumPy array sharing the column's memory."""
+        column = self.column(field)
+        return np.frombuffer(column, dtype=column.typecode) if len(column) else np.zeros(0, column.typecode)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.itemsize * len(column) for column in self.columns)
+
+    def __len__(self) -> int:
+        return len(self.columns[0])
+
+    def __iter__(self):
+        return zip(*self.columns)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            part = PointArray.__new__(PointArray)
+            part.fields = self.fields
+            part.columns = tuple(column[index] for column in self.columns)
+            return part
+        return tuple(column[index] for column in self.columns)
+
+    def __eq__(self, other):
+        if isinstance(other, PointArray):
+            return self.fields == other.fields and self.columns == other.columns
+        return list(self) == list(other)
+
+    def __repr__(self):
+        return f"PointArray({', '.join(self.fields)}; {len(self)} points)"
+
+
+class Ornament:
+    """Position and size of an ornament slot, in reference pixels."""
+
+    __slots__ = ('x', 'y', 'size')
+
+    def __init__(self, x: int, y: int, size: int):
+        self.x, self.y, self.size = x, y, size
+
+    def __iter__(self):
+        return iter((self.x, self.y, self.size))
+
+    def __repr__(self):
+        return f"Ornament(x={self.x}, y={self.y}, size={self.size})"
+
+
+def _point_columns(points, count: int):
+    """Return the first count fields of points (a PointArray or a list of tuples) as NumPy arrays."""
+    if isinstance(points, PointArray):
+        return [points.as_numpy(field).astype(np.int64) for field in points.fields[:count]]
+    if not len(points):
+        return [np.zeros(0, np.int64) for _ in range(count)]
+    table = np.array([point[:count] for point in points], np.int64)
+    return [table[:, i] for i in range(count)]
+
+
+# The scene is laid out on this reference canvas. Positions and sizes in
+# SCENE and in build_scene() are in reference pixels and are scaled to the
+# actual render size, so the same scene can be rasterized at any resolution.
+REFERENCE_SIZE = (1200, 1600)
+
+# Smallest canvas side accepted from the command line and the service
+MIN_CANVAS_SIZE = 16
+
+SCENE = {
+    'background_stars': 200,
+    'twinkling_stars': 50,
+    'tree_top': 120,
+    'tree_bottom_margin': 280,
+    'tree_base_width': 500,
+    'tree_layers': 6,
+    'branches_per_layer': 15,
+    'ornaments_per_row': [1, 2, 3, 4, 5, 6],  # Total = 21
+    'ornament_size_range': (149, 189),
+    'trunk_size': (80, 120),
+    'pot_size': (160, 80),
+    'star_size': 100,
+    'light_size': 4,
+    'snowflakes': 25,
+    'snowflake_size_range': (15, 25),
+    'text_width': 1100,
+    'frame_count': 20,
+    'frame_duration': 100,  # milliseconds
+}
+
+
+def scene_scale(width: int, height: int) -> tuple:
+    """Return (x scale, y scale, size scale) from the reference canvas to width x height."""
+    sx = width / REFERENCE_SIZE[0]
+    sy = height / REFERENCE_SIZE[1]
+    return sx, sy, min(sx, sy)
+
+
+def scaled_size(value: float, scale: float, minimum: int = 1) -> int:
+    """Scale a reference-pixel length, never going below minimum pixels."""
+    return max(minimum, int(round(value * scale)))
+
+
+def build_scene(rng=random) -> dict:
+    """Lay out the random parts of the scene in reference pixels.
+
+    rng is the random source (the random module by default, so that
+    random.seed() before the call gives a reproducible tree). Stars and
+    lights are PointArrays, ornaments Ornament records.
+    """
+    width, height = REFERENCE_SIZE
 
     # Background stars
-    star_positions = []
-    for _ in range(200):
-        x = random.randint(0, width)
-        y = random.randint(0, height // 2)
-        brightness = random.randint(150, 255)
-        size = random.choice([1, 1, 1, 2])
-        draw.ellipse([x, y, x+size, y+size], fill=(brightness, brightness, brightness, 255))
-        star_positions.append((x, y, brightness))
+    stars = PointArray(('x', 'y', 'brightness', 'size'), 'iiBB')
+    for _ in range(SCENE['background_stars']):
+        x = rng.randint(0, width)
+        y = rng.randint(0, height // 2)
+        brightness = rng.randint(150, 255)
+        size = rng.choice([1, 1, 1, 2])
+        stars.append((x, y, brightness, size))
 
     # Tree parameters
-    tree_top = 120
-    tree_bottom = height - 280
+    tree_top = SCENE['tree_top']
+    tree_bottom = height - SCENE['tree_bottom_margin']
     tree_height = tree_bottom - tree_top
     tree_center = width // 2
-    tree_base_width = 500
+    tree_base_width = SCENE['tree_base_width']
 
     tree_color_dark = (0, 80, 20, 255)
     tree_color_mid = (20, 120, 40, 255)
     tree_color_light = (40, 160, 60, 255)
 
-    # Draw tree layers - 6 LEVELS
+    # Tree layers - 6 LEVELS
     # Width multiplier: 2x at bottom (layer 5), 1x at top (layer 0)
-    num_layers = 6
+    num_layers = SCENE['tree_layers']
+    layers = []
     for layer in range(num_layers):
         layer_top = tree_top + (tree_height * layer // num_layers)
         layer_bottom = tree_top + (tree_height * (layer + 1) // num_layers) + 30
 
         # Calculate width multiplier: from 1.0 (top) to 2.0 (bottom)
         width_multiplier = 1.0 + (layer / (num_layers - 1))
-
-        top_width = int(tree_base_width * (layer / num_layers) * 0.8 * width_multiplier)
         bottom_width = int(tree_base_width * ((layer + 1) / num_layers) * width_multiplier)
 
-        for offset in range(3):
-            shade = 1 - offset * 0.1
-            color = (int(tree_color_mid[0] * shade),
-                    int(tree_color_mid[1] * shade),
-                    int(tree_color_mid[2] * shade), 255)
-
-            points = [
-                (tree_center, layer_top - 10),
-                (tree_center - bottom_width // 2 + offset * 5, layer_bottom),
-                (tree_center + bottom_width // 2 - offset * 5, layer_bottom),
-            ]
-            draw.polygon(points, fill=color)
-
         # Branch texture
-        for _ in range(15):
-            bx = random.randint(tree_center - bottom_width//2 + 20,
-                               tree_center + bottom_width//2 - 20)
-            by = random.randint(layer_top + 10, layer_bottom - 10)
-            branch_len = random.randint(10, 30)
+        branches = []
+        for _ in range(SCENE['branches_per_layer']):
+            bx = rng.randint(tree_center - bottom_width//2 + 20,
+                             tree_center + bottom_width//2 - 20)
+            by = rng.randint(layer_top + 10, layer_bottom - 10)
+            branch_len = rng.randint(10, 30)
             direction = -1 if bx < tree_center else 1
 
-            branch_color = random.choice([tree_color_dark, tree_color_mid, tree_color_light])
-            draw.line([bx, by, bx + direction * branch_len, by + branch_len//2],
-                     fill=branch_color, width=random.randint(2, 4))
-
-    # Trunk
-    trunk_width = 80
-    trunk_height = 120
-    trunk_top = tree_bottom - 20
-
-    for i in range(trunk_width // 2):
-        shade = 0.5 + (i / trunk_width)
-        color = (int(101 * shade), int(67 * shade), int(33 * shade), 255)
-        draw.rectangle([
-            tree_center - trunk_width//2 + i, trunk_top,
-            tree_center + trunk_width//2 - i, trunk_top + trunk_height
-        ], fill=color)
-
-    # Pot
-    pot_width = 160
-    pot_height = 80
-    pot_top = trunk_top + trunk_height - 10
-
-    draw.rectangle([tree_center - pot_width//2, pot_top,
-                   tree_center + pot_width//2, pot_top + pot_height],
-                  fill=(139, 69, 19, 255), outline=(100, 50, 10, 255), width=3)
-    draw.rectangle([tree_center - pot_width//2 - 10, pot_top,
-                   tree_center + pot_width//2 + 10, pot_top + 20],
-                  fill=(160, 82, 45, 255), outline=(100, 50, 10, 255), width=2)
+            branch_color = rng.choice([tree_color_dark, tree_color_mid, tree_color_light])
+            branches.append(((bx, by, bx + direction * branch_len, by + branch_len//2),
+                             branch_color, rng.randint(2, 4)))
+        layers.append((layer_top, layer_bottom, bottom_width, branches))
 
     # Calculate 21 ornament positions - 6 LEVELS (1+2+3+4+5+6 = 21)
     # Shifted down by one tree level (row+1 instead of row for vertical position)
-    ornament_positions = []
-    ornament_sizes = []
-
-    ornaments_per_row = [1, 2, 3, 4, 5, 6]  # Total = 21
-
-    for row, num_ornaments in enumerate(ornaments_per_row):
+    ornaments = []
+    for row, num_ornaments in enumerate(SCENE['ornaments_per_row']):
         # Shift down by one level: use (row + 1) for y position, distributed over 6 intervals
         y = tree_top + 70 + (tree_height - 140) * (row + 1) // 6
         # Apply same width multiplier as tree layers: 1.0 at top to 2.0 at bottom
@@ -333,15 +1161,14 @@ def create_base_tree(width: int, height: int) -> tuple:
             else:
                 x = tree_center
 
-            x += random.randint(-10, 10)
-            y_offset = random.randint(-8, 8)
+            x += rng.randint(-10, 10)
+            y_offset = rng.randint(-8, 8)
 
-            size = random.randint(149, 189)
-            ornament_positions.append((int(x), int(y + y_offset)))
-            ornament_sizes.append(size)
+            size = rng.randint(*SCENE['ornament_size_range'])
+            ornaments.append(Ornament(int(x), int(y + y_offset), size))
 
     # Generate light positions on tree
-    light_positions = []
+    lights = PointArray(('x', 'y'), 'ii')
     for row in range(6):
         y_base = tree_top + 50 + (tree_height - 100) * row // 6
         # Apply same width multiplier
@@ -350,225 +1177,1767 @@ def create_base_tree(width: int, height: int) -> tuple:
 
         for i in range(8 + row * 2):
             x = tree_center - row_width//2 + (row_width * i / (7 + row * 2))
-            y = y_base + random.randint(-15, 15)
+            y = y_base + rng.randint(-15, 15)
             if tree_center - row_width//2 - 10 < x < tree_center + row_width//2 + 10:
-                light_positions.append((int(x), int(y)))
+                lights.append((int(x), int(y)))
 
-    return img, {
+    return {
         'tree_top': tree_top,
         'tree_bottom': tree_bottom,
         'tree_height': tree_height,
         'tree_center': tree_center,
         'tree_base_width': tree_base_width,
-        'ornament_positions': ornament_positions,
-        'ornament_sizes': ornament_sizes,
-        'light_positions': light_positions,
-        'star_positions': star_positions
+        'tree_colors': (tree_color_dark, tree_color_mid, tree_color_light),
+        'stars': stars,
+        'layers': layers,
+        'ornaments': ornaments,
+        'lights': lights
     }
 
 
-def add_text(img: Image.Image, width: int, height: int) -> Image.Image:
-    """Add the Christmas message text."""
+class OffsetDraw:
+    """ImageDraw stand-in that draws canvas coordinates onto a tile whose top-left is at origin.
+
+    Only the xy argument of each drawing call is shifted, so code written
+    for the whole canvas can draw any part of it into a smaller image.
+    """
+
+    def __init__(self, image: Image.Image, origin: tuple = (0, 0)):
+        self._draw = ImageDraw.Draw(image)
+        self.origin = origin
+
+    def _shift(self, xy):
+        ox, oy = self.origin
+        if xy and isinstance(xy[0], (tuple, list)):
+            return [(x - ox, y - oy) for x, y in xy]
+        return [v - (oy if i % 2 else ox) for i, v in enumerate(xy)]
+
+    def __getattr__(self, name: str):
+        method = getattr(self._draw, name)
+        if not any(self.origin):
+            return method
+
+        def shifted(xy, *args, **kwargs):
+            return method(self._shift(xy), *args, **kwargs)
+        return shifted
+
+
+def base_tree_metadata(scene: dict, width: int, height: int) -> dict:
+    """Lay a scene out at width x height: positions and sizes in canvas pixels."""
+    sx, sy, s = scene_scale(width, height)
+
+    def px(x):
+        return int(round(x * sx))
+
+    def py(y):
+        return int(round(y * sy))
+
+    stars = scene['stars']
+    star_positions = PointArray(('x', 'y', 'brightness'), 'iiB')
+    star_positions.columns[0].extend(px(x) for x in stars.column('x'))
+    star_positions.columns[1].extend(py(y) for y in stars.column('y'))
+    star_positions.columns[2].extend(stars.column('brightness'))
+
+    return {
+        'tree_top': py(scene['tree_top']),
+        'tree_bottom': py(scene['tree_bottom']),
+        'tree_height': py(scene['tree_bottom']) - py(scene['tree_top']),
+        'tree_center': px(scene['tree_center']),
+        'tree_base_width': px(scene['tree_base_width']),
+        'ornament_positions': [(px(x), py(y)) for x, y, _ in scene['ornaments']],
+        'ornament_sizes': [scaled_size(size, s, 8) for _, _, size in scene['ornaments']],
+        'light_positions': PointArray(('x', 'y'), 'ii', ((px(x), py(y)) for x, y in scene['lights'])),
+        'star_positions': star_positions,
+        'scale': (sx, sy, s),
+        'canvas': (width, height),
+        'scene': scene
+    }
+
+
+def draw_base_tree(target: Image.Image, origin: tuple, metadata: dict, backend: str = 'auto'):
+    """Draw the static part of the scene into a target whose top-left is at origin.
+
+    target must start opaque black. Elements entirely outside the target
+    are skipped, so a canvas can be drawn tile by tile. backend selects how
+    the background stars are drawn (see RENDER_BACKENDS).
+    """
+    scene = metadata['scene']
+    width, height = metadata['canvas']
+    sx, sy, s = metadata['scale']
+    ox, oy = origin
+    tile_width, tile_height = target.size
+
+    def px(x):
+        return int(round(x * sx))
+
+    def py(y):
+        return int(round(y * sy))
+
+    draw = OffsetDraw(target, origin)
+
+    # Gradient background (night sky)
+    for y in range(max(0, oy), min(height, oy + tile_height)):
+        ratio = y / height
+        r = int(5 + ratio * 10)
+        g = int(10 + ratio * 20)
+        b = int(30 + ratio * 40)
+        draw.line([(0, y), (width, y)], fill=(r, g, b, 255))
+
+    # Background stars
+    stars = scene['stars']
+    star_positions = metadata['star_positions']
+    if resolve_backend(backend) == 'numpy':
+        # Place all the dots at once
+        size_of = {size: scaled_size(size, s) for size in set(stars.column('size'))}
+        pixels = np.array(target)
+        _stamp_dots(pixels, star_positions.as_numpy('x').astype(np.int64) - ox,
+                    star_positions.as_numpy('y').astype(np.int64) - oy,
+                    np.array([size_of[size] for size in stars.column('size')], np.int64),
+                    star_positions.as_numpy('brightness'))
+        target.paste(Image.fromarray(pixels))
+    else:
+        for (x, y, brightness), size in zip(star_positions, stars.column('size')):
+            size = scaled_size(size, s)
+            if ox - size <= x < ox + tile_width and oy - size <= y < oy + tile_height:
+                draw.ellipse([x, y, x+size, y+size], fill=(brightness, brightness, brightness, 255))
+
+    tree_center = scene['tree_center']
+    tree_color_mid = scene['tree_colors'][1]
+
+    # Draw tree layers, each followed by its branch texture
+    for layer_top, layer_bottom, bottom_width, branches in scene['layers']:
+        if py(layer_top - 10) > oy + tile_height + s * 4 or py(layer_bottom) < oy - s * 4:
+            continue
+        for offset in range(3):
+            shade = 1 - offset * 0.1
+            color = (int(tree_color_mid[0] * shade),
+                    int(tree_color_mid[1] * shade),
+                    int(tree_color_mid[2] * shade), 255)
+
+            points = [
+                (px(tree_center), py(layer_top - 10)),
+                (px(tree_center - bottom_width // 2 + offset * 5), py(layer_bottom)),
+                (px(tree_center + bottom_width // 2 - offset * 5), py(layer_bottom)),
+            ]
+            draw.polygon(points, fill=color)
+
+        for (x1, y1, x2, y2), branch_color, branch_width in branches:
+            draw.line([px(x1), py(y1), px(x2), py(y2)],
+                     fill=branch_color, width=scaled_size(branch_width, s))
+
+    # Trunk
+    trunk_width = scaled_size(SCENE['trunk_size'][0], s)
+    trunk_height = scaled_size(SCENE['trunk_size'][1], s)
+    trunk_top = py(scene['tree_bottom'] - 20)
+    center = metadata['tree_center']
+
+    for i in range(trunk_width // 2):
+        shade = 0.5 + (i / trunk_width)
+        color = (int(101 * shade), int(67 * shade), int(33 * shade), 255)
+        draw.rectangle([
+            center - trunk_width//2 + i, trunk_top,
+            center + trunk_width//2 - i, trunk_top + trunk_height
+        ], fill=color)
+
+    # Pot
+    pot_width = scaled_size(SCENE['pot_size'][0], s)
+    pot_height = scaled_size(SCENE['pot_size'][1], s)
+    pot_top = trunk_top + trunk_height - scaled_size(10, s)
+    rim = scaled_size(10, s)
+
+    draw.rectangle([center - pot_width//2, pot_top,
+                   center + pot_width//2, pot_top + pot_height],
+                  fill=(139, 69, 19, 255), outline=(100, 50, 10, 255), width=scaled_size(3, s))
+    draw.rectangle([center - pot_width//2 - rim, pot_top,
+                   center + pot_width//2 + rim, pot_top + scaled_size(20, s)],
+                  fill=(160, 82, 45, 255), outline=(100, 50, 10, 255), width=scaled_size(2, s))
+
+
+def render_base_tree(scene: dict, width: int, height: int, backend: str = 'auto') -> tuple:
+    """Rasterize the static part of a scene at width x height. Returns image and metadata."""
+    metadata = base_tree_metadata(scene, width, height)
+    img = Image.new('RGBA', (width, height), (0, 0, 0, 255))
+    draw_base_tree(img, (0, 0), metadata, backend)
+    return img, metadata
+
+
+def create_base_tree(width: int, height: int, backend: str = 'auto') -> tuple:
+    """Create the static base elements of the tree. Returns image and metadata.
+
+    The layout is drawn from the global random state and rasterized at
+    width x height; metadata positions and sizes are in canvas pixels.
+    """
+    return render_base_tree(build_scene(), width, height, backend)
+
+
+@functools.lru_cache(maxsize=4)
+def seeded_base_tree(width: int, height: int, backend: str = 'auto') -> tuple:
+    """Return create_base_tree for the SCENE_SEED layout, built once per canvas size and backend.
+
+    The image and metadata are shared between callers and must not be modified.
+    """
+    return render_base_tree(build_scene(random.Random(SCENE_SEED)), width, height, backend)
+
+
+# Serif fonts for the message, in order of preference
+FONT_PATHS = (
+    "/usr/share/fonts/truetype/dejavu/DejaVuSerif.ttf",
+    "/usr/share/fonts/truetype/freefont/FreeSerif.ttf",
+)
+
+
+@functools.lru_cache(maxsize=None)
+def find_font_path() -> str:
+    """Return the first installed message font, or None; looked up once per process."""
+    for font_path in FONT_PATHS:
+        if os.path.exists(font_path):
+            return font_path
+    return None
+
+
+@functools.lru_cache(maxsize=8)
+def load_font(size: int):
+    """Load the message font at a pixel size, falling back to Pillow's default font."""
+    font_path = find_font_path()
+    if font_path is None:
+        return ImageFont.load_default()
+    return ImageFont.truetype(font_path, size)
+
+
+# Scales the message is rendered at: smaller canvases downscale the text
+# rendered at TEXT_MIN_DETAIL, bigger ones upscale it from TEXT_MAX_DETAIL
+TEXT_MIN_DETAIL = 0.25
+TEXT_MAX_DETAIL = 4.0
+
+
+def create_text_layer(width: int, height: int):
+    """Render the Christmas message text.
+
+    Returns the text image and its top-left position on the canvas, or None
+    if nothing could be rendered.
+    """
 
     message = "Merry Christmas and clear skies for stargazing!"
+    sx, sy, s = scene_scale(width, height)
 
     # Target width matches the tree foliage at the base
-    target_width = 1100
+    target_width = scaled_size(SCENE['text_width'], s)
 
-    # Try to load a nice font with a reasonable base size
-    font_size = 40
-    font_paths = [
-        "/usr/share/fonts/truetype/dejavu/DejaVuSerif.ttf",
-        "/usr/share/fonts/truetype/freefont/FreeSerif.ttf"
-    ]
-
-    font = None
-    for font_path in font_paths:
-        if os.path.exists(font_path):
-            font = ImageFont.truetype(font_path, font_size)
-            break
+    # Render the text at the canvas scale instead of resizing it, within
+    # TEXT_MIN_DETAIL..TEXT_MAX_DETAIL (the scratch image grows with the square of it)
+    detail = min(max(TEXT_MIN_DETAIL, s), TEXT_MAX_DETAIL)
 
-    if font is None:
-        font = ImageFont.load_default()
+    # Try to load a nice font with a reasonable base size
+    font_size = int(round(40 * detail))
+    font = load_font(font_size)
 
     # Create a temporary image to render the text
-    temp_img = Image.new('RGBA', (2000, 200), (0, 0, 0, 0))
+    temp_img = Image.new('RGBA', (int(2000 * detail), int(200 * detail)), (0, 0, 0, 0))
     temp_draw = ImageDraw.Draw(temp_img)
+    text_origin = (int(10 * detail), int(10 * detail))
 
     # Draw text with glow on temporary image
     for offset in range(12, 0, -1):
         alpha = int(100 * (1 - offset/12))
-        temp_draw.text((10, 10), message, font=font,
+        temp_draw.text(text_origin, message, font=font,
                       fill=(255, 200, 100, alpha),
-                      stroke_width=offset, stroke_fill=(255, 150, 50, alpha//2))
+                      stroke_width=int(round(offset * detail)), stroke_fill=(255, 150, 50, alpha//2))
 
-    temp_draw.text((10, 10), message, font=font,
+    temp_draw.text(text_origin, message, font=font,
                   fill=(255, 223, 100, 255),
-                  stroke_width=3, stroke_fill=(200, 150, 50, 255))
+                  stroke_width=int(round(3 * detail)), stroke_fill=(200, 150, 50, 255))
 
     # Get the bounding box of the text
     bbox = temp_img.getbbox()
-    if bbox:
-        # Crop to text content
-        text_cropped = temp_img.crop(bbox)
-        current_width = text_cropped.width
-        current_height = text_cropped.height
+    if not bbox:
+        return None
 
-        # Scale to target width
-        scale_factor = target_width / current_width
-        new_width = target_width
-        new_height = int(current_height * scale_factor)
+    # Crop to text content
+    text_cropped = temp_img.crop(bbox)
+    current_width = text_cropped.width
+    current_height = text_cropped.height
 
-        # Resize the text image
-        text_scaled = text_cropped.resize((new_width, new_height), Image.LANCZOS)
+    # Scale to target width
+    scale_factor = target_width / current_width
+    new_width = target_width
+    new_height = max(1, int(current_height * scale_factor))
 
-        # Position at bottom center
-        text_x = (width - new_width) // 2
-        text_y = height - new_height - 20
+    # Resize the text image
+    text_scaled = text_cropped.resize((new_width, new_height), Image.LANCZOS)
 
-        # Paste onto main image
-        img.paste(text_scaled, (text_x, text_y), text_scaled)
+    # Position at bottom center
+    text_x = (width - new_width) // 2
+    text_y = height - new_height - int(round(20 * sy))
 
-    return img
+    return text_scaled, (text_x, text_y)
 
-    return Image.alpha_composite(img, text_img)
 
+def add_text(img: Image.Image, width: int, height: int) -> Image.Image:
+    """Add the Christmas message text."""
+    text_layer = create_static_layers(width, height)['text']
+    if text_layer:
+        text_scaled, position = text_layer
+        img.paste(text_scaled, position, text_scaled)
 
-def generate_frame(base_img: Image.Image, metadata: dict, frame_num: int,
-                   total_frames: int, ornaments: list, images: list, use_default: bool) -> Image.Image:
-    """Generate a single animation frame."""
+    return img
 
-    width, height = base_img.size
-    img = base_img.copy()
 
-    phase = (frame_num / total_frames) * 2 * math.pi
+def create_vignette(width: int, height: int) -> Image.Image:
+    """Create the darkened-border vignette layer."""
+    vignette = Image.new('RGBA', (width, height), (0, 0, 0, 0))
+    draw_vignette(ImageDraw.Draw(vignette), width, height)
+    return vignette
 
-    # Add animated twinkling stars
-    stars_img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-    stars_draw = ImageDraw.Draw(stars_img)
 
-    for i, (x, y, base_brightness) in enumerate(metadata['star_positions'][:50]):
-        twinkle = math.sin(phase + i * 0.3)
-        brightness = int(base_brightness * (0.7 + 0.3 * twinkle))
-        stars_draw.ellipse([x-1, y-1, x+2, y+2], fill=(brightness, brightness, brightness, 255))
+def draw_vignette(vignette_draw, width: int, height: int):
+    """Draw the vignette frames of a width x height canvas with vignette_draw."""
+    _, _, s = scene_scale(width, height)
+    for i in range(30):
+        alpha = int(4 * i)
+        margin = int(round(i * 15 * s))
+        vignette_draw.rectangle([margin, margin, width-margin, height-margin],
+                               outline=(0, 0, 0, alpha))
 
-    img = Image.alpha_composite(img, stars_img)
 
-    # Add snowflakes with slight movement
-    snow_img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-    random.seed(42)  # Consistent positions
-    for i in range(25):
-        x = random.randint(0, width)
-        y = random.randint(0, height)
-        # Gentle falling motion
-        y_offset = int((frame_num * 2 + i * 20) % 50 - 25)
-        snowflake = create_snowflake(random.randint(15, 25))
-        snow_img.paste(snowflake, (x, y + y_offset), snowflake)
+@functools.lru_cache(maxsize=4)
+def create_static_layers(width: int, height: int) -> dict:
+    """Render the layers that are identical in every frame, once per canvas size.
 
-    img = Image.alpha_composite(img, snow_img)
+    Text and vignette sit above the animated layers, so they cannot be baked
+    into the base image; they are kept ready to paste/composite instead.
+    Snowflakes only move vertically, so their sprites and positions are fixed.
+    Treat the returned images as read-only.
+    """
+    return {
+        'text': create_text_layer(width, height),
+        'vignette': create_vignette(width, height),
+        'snowflakes': place_snowflakes(width, height)
+    }
 
-    # Add ornaments with glow animation
-    for idx, ((x, y), size) in enumerate(zip(metadata['ornament_positions'], metadata['ornament_sizes'])):
-        glow_phase = phase + idx * 0.5
 
+def place_snowflakes(width: int, height: int) -> list:
+    """Return the (x, y, sprite) of every snowflake at rest on a width x height canvas."""
+    sx, sy, s = scene_scale(width, height)
+    rng = random.Random(42)  # Consistent snowflake positions
+    snowflakes = []
+    for i in range(SCENE['snowflakes']):
+        x = int(round(rng.randint(0, REFERENCE_SIZE[0]) * sx))
+        y = int(round(rng.randint(0, REFERENCE_SIZE[1]) * sy))
+        size = scaled_size(rng.randint(*SCENE['snowflake_size_range']), s, 5)
+        snowflakes.append((x, y, create_snowflake(size)))
+    return snowflakes
+
+
+# Sprite atlas file format marker, stored with the index in the PNG sheet
+ATLAS_FORMAT = 'stargazers-xmastree-atlas/1'
+
+
+def _blit(target: Image.Image, sprite: Image.Image, x: int, y: int):
+    """Alpha-composite sprite onto target with its top-left at (x, y), clipped to target."""
+    x1, y1 = max(x, 0), max(y, 0)
+    x2, y2 = min(x + sprite.width, target.width), min(y + sprite.height, target.height)
+    if x1 < x2 and y1 < y2:
+        target.alpha_composite(sprite, dest=(x1, y1), source=(x1 - x, y1 - y, x2 - x, y2 - y))
+
+
+class SpriteAtlas:
+    """Pre-rendered light and star sprites, at reference scale.
+
+    Every light colour is rendered at `levels` brightness levels and the
+    star at `levels` twinkle phases. Frames composed from the atlas show the
+    nearest level instead of the exact state, so each light and the star are
+    a single blit. Sprites for other canvas scales are resized from the
+    reference ones and kept in an LRU. save() and load() persist the atlas
+    as one PNG sheet.
+    """
+
+    # Number of resized sprites kept
+    SCALED_CACHE_SIZE = 512
+
+    def __init__(self, levels: int, sprites: dict = None):
+        if levels < 2:
+            raise ValueError("a sprite atlas needs at least 2 levels")
+        self.levels = levels
+        self.sprites = sprites if sprites is not None else self._render_sprites(levels)
+        self._scaled = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _render_sprites(levels: int) -> dict:
+        sprites = {}
+        size = SCENE['light_size']
+        for index in range(len(LIGHT_COLORS)):
+            for level in range(levels):
+                state = light_appearance(level / (levels - 1), index, size)
+                radius = max(state[2], size // 2)
+                sprite = Image.new('RGBA', (2 * radius + 1, 2 * radius + 1), (0, 0, 0, 0))
+                draw_lights(sprite, (0, 0), [(radius, radius)], [state], 'pil', size)
+                sprites[f"light/{index}/{level}"] = sprite
+
+        star_size = max(SCENE['star_size'], 12)
+        for level in range(levels):
+            state = star_state(2 * math.pi * level / levels)
+            sprites[f"star/{level}"] = render_star(star_size, *state, backend='pil')
+        return sprites
+
+    def light(self, index: int, brightness: float, s: float = 1.0) -> Image.Image:
+        """Sprite of light index at the nearest brightness level, for size scale s.
+
+        The light's center is the sprite's center pixel.
+        """
+        level = min(self.levels - 1, max(0, round(brightness * (self.levels - 1))))
+        name = f"light/{index % len(LIGHT_COLORS)}/{level}"
+        radius = self.sprites[name].width // 2
+        return self._resized(name, 2 * max(0, round(radius * s)) + 1)
+
+    def star(self, twinkle_phase: float, size: int) -> Image.Image:
+        """Sprite of the star at the nearest twinkle phase, size pixels square."""
+        level = round(twinkle_phase % (2 * math.pi) / (2 * math.pi) * self.levels) % self.levels
+        return self._resized(f"star/{level}", size)
+
+    def _resized(self, name: str, side: int) -> Image.Image:
+        sprite = self.sprites[name]
+        if sprite.width == side:
+            return sprite
+        key = (name, side)
+        with self._lock:
+            resized = self._scaled.get(key)
+            if resized is None:
+                resized = self._scaled[key] = sprite.resize((side, side), Image.LANCZOS)
+                if len(self._scaled) > self.SCALED_CACHE_SIZE:
+                    self._scaled.popitem(last=False)
+            else:
+                self._scaled.move_to_end(key)
+        return resized
+
+    def save(self, path: str):
+        """Write the atlas as a PNG sheet, with the sprite index in a text chunk."""
+        # Shelf packing: sprites sorted by height, in rows of at most 1024 pixels
+        index, x, y, shelf = {}, 0, 0, 0
+        for name, sprite in sorted(self.sprites.items(), key=lambda item: -item[1].height):
+            if x and x + sprite.width > 1024:
+                x, y, shelf = 0, y + shelf, 0
+            index[name] = (x, y, sprite.width, sprite.height)
+            x += sprite.width
+            shelf = max(shelf, sprite.height)
+        sheet = Image.new('RGBA', (max(1, max(bx + w for bx, _, w, _ in index.values())), y + shelf))
+        for name, (bx, by, _, _) in index.items():
+            sheet.paste(self.sprites[name], (bx, by))
+
+        info = PngImagePlugin.PngInfo()
+        info.add_text('Software', OUTPUT_SOFTWARE)
+        info.add_text(ATLAS_FORMAT, json.dumps({'levels': self.levels, 'renderer_version': RENDERER_VERSION,
+                                                'sprites': index}))
+        _replace_atomically(path, lambda fp: sheet.save(fp, 'PNG', pnginfo=info))
+
+    @classmethod
+    def load(cls, path: str) -> 'SpriteAtlas':
+        """Read an atlas written by save(). Raises ValueError if it is not a current atlas."""
+        with Image.open(path) as sheet:
+            sheet.load()
+            header = json.loads(sheet.text.get(ATLAS_FORMAT, 'null') or 'null')
+            if not header or header.get('renderer_version') != RENDERER_VERSION:
+                raise ValueError(f"{path} is not a sprite atlas of this renderer version")
+            sprites = {name: sheet.crop((x, y, x + w, y + h))
+                       for name, (x, y, w, h) in header['sprites'].items()}
+        return cls(header['levels'], sprites)
+
+
+# Sprite atlases of this process, by number of levels
+_atlases = {}
+
+
+def sprite_atlas(levels: int) -> SpriteAtlas:
+    """Return the SpriteAtlas with the given number of levels.
+
+    It is built once per process; with a render cache in use it is loaded
+    from and saved to the cache folder, so later runs skip building it.
+    """
+    atlas = _atlases.get(levels)
+    if atlas is None:
+        path = _render_cache.atlas_path(levels) if _render_cache else None
+        if path and os.path.exists(path):
+            try:
+                atlas = SpriteAtlas.load(path)
+            except (OSError, ValueError, KeyError):
+                atlas = None
+        if atlas is None:
+            atlas = SpriteAtlas(levels)
+            if path:
+                atlas.save(path)
+        _atlases[levels] = atlas
+    return atlas
+
+
+def blit_lights(target: Image.Image, origin: tuple, positions: list, states: list,
+                atlas: SpriteAtlas, s: float = 1.0):
+    """Draw lights as atlas sprites into a target whose top-left is at origin."""
+    ox, oy = origin
+    for i, ((x, y), state) in enumerate(zip(positions, states)):
+        sprite = atlas.light(i, state[0], s)
+        radius = sprite.width // 2
+        _blit(target, sprite, x - ox - radius, y - oy - radius)
+
+
+class AnimationTimeline:
+    """Every animated parameter of every frame of the loop, computed once.
+
+    Values are stored frame-major in flat typed arrays, one track per
+    parameter, so rendering a frame only reads precomputed values and long
+    loops stay compact. to_dict() exports the timeline for other renderers.
+    Positions and sizes are in canvas pixels of the metadata's canvas.
+    """
+
+    def __init__(self, metadata: dict, total_frames: int):
+        _, _, s = metadata.get('scale', (1.0, 1.0, 1.0))
+        self.total_frames = total_frames
+        self.light_size = scaled_size(SCENE['light_size'], s)
+        star_brightness = [star[2] for star in metadata['star_positions'][:SCENE['twinkling_stars']]]
+        num_ornaments = len(metadata['ornament_positions'])
+        num_lights = len(metadata['light_positions'])
+        rows = garland_rows(metadata, 0)
+        self.garland_shape = (len(rows), len(rows[0]) if rows else 0)
+
+        self.star_brightness = array('B')    # per twinkling star
+        self.snow_offsets = array('h')       # per snowflake
+        self.ornament_glow = array('B')      # per ornament: ornament_glow()
+        self.default_glow = array('d')       # per ornament: default_ornament_glow() intensity
+        self.default_highlight = array('B')  # per ornament: default_ornament_glow() highlight
+        self.star = array('d')               # star_state()
+        self.light_brightness = array('d')   # per light
+        self.light_glow_size = array('H')    # per light
+        self.light_colors = array('B')       # per light: color, center color
+        self.garland_points = array('d')     # per row and point: x, y
+        self.garland_sparkles = array('B')   # per point of a row: sparkle alpha (0: none)
+
+        sy = metadata.get('scale', (1.0, 1.0, 1.0))[1]
+        for frame_num in range(total_frames):
+            phase = self.phase(frame_num)
+            self.star_brightness.extend(star_twinkle(base_brightness, phase, i)
+                                        for i, base_brightness in enumerate(star_brightness))
+            self.snow_offsets.extend(snowflake_offset(frame_num, i, sy) for i in range(SCENE['snowflakes']))
+            for idx in range(num_ornaments):
+                glow_phase = phase + idx * 0.5
+                self.ornament_glow.extend(ornament_glow(glow_phase))
+                glow_intensity, highlight_alpha = default_ornament_glow(glow_phase)
+                self.default_glow.append(glow_intensity)
+                self.default_highlight.append(highlight_alpha)
+            self.star.extend(star_state(phase * 2))
+            for i in range(num_lights):
+                brightness, color, glow_size, center_color = light_state(frame_num, i, self.light_size)
+                self.light_brightness.append(brightness)
+                self.light_glow_size.append(glow_size)
+                self.light_colors.extend(color + center_color)
+            for row in garland_rows(metadata, phase):
+                for point in row:
+                    self.garland_points.extend(point)
+            self.garland_sparkles.extend(garland_sparkles(frame_num, phase, max(0, self.garland_shape[1] - 1)))
+
+    def phase(self, frame_num: int) -> float:
+        """Animation phase of a frame, in radians."""
+        return (frame_num / self.total_frames) * 2 * math.pi
+
+    @staticmethod
+    def _frame(track: array, frame_num: int, per_frame: int) -> array:
+        return track[frame_num * per_frame:(frame_num + 1) * per_frame]
+
+    def star_brightness_at(self, frame_num: int) -> array:
+        """Brightness of each twinkling star."""
+        return self._frame(self.star_brightness, frame_num, len(self.star_brightness) // self.total_frames)
+
+    def snow_offsets_at(self, frame_num: int) -> array:
+        """Vertical offset of each snowflake from its rest position."""
+        return self._frame(self.snow_offsets, frame_num, SCENE['snowflakes'])
+
+    def ornament_state(self, frame_num: int, idx: int, use_default: bool) -> tuple:
+        """Glow state of an ornament slot, for create_slot_ornament."""
+        i = frame_num * len(self.default_glow) // self.total_frames + idx
         if use_default:
-            default_colors = [
-                (255, 0, 0), (0, 100, 255), (255, 215, 0),
-                (255, 0, 255), (0, 255, 255), (255, 128, 0)
-            ]
-            color = default_colors[idx % len(default_colors)]
+            return self.default_glow[i], self.default_highlight[i]
+        return self.ornament_glow[2 * i], self.ornament_glow[2 * i + 1]
+
+    def star_state(self, frame_num: int) -> tuple:
+        """(pulse, glow_intensity, highlight_scale) of the star, for render_star."""
+        return tuple(self._frame(self.star, frame_num, 3))
+
+    def light_states(self, frame_num: int) -> list:
+        """light_state() of every light, for draw_lights."""
+        brightness = self._frame(self.light_brightness, frame_num, len(self.light_brightness) // self.total_frames)
+        glow_sizes = self._frame(self.light_glow_size, frame_num, len(brightness))
+        colors = self._frame(self.light_colors, frame_num, 6 * len(brightness))
+        return [(brightness[i], tuple(colors[6*i:6*i + 3]), glow_sizes[i], tuple(colors[6*i + 3:6*i + 6]))
+                for i in range(len(brightness))]
+
+    def garland(self, frame_num: int) -> tuple:
+        """(rows, sparkles) of the garland, for draw_garland_rows."""
+        num_rows, num_points = self.garland_shape
+        values = self._frame(self.garland_points, frame_num, 2 * num_rows * num_points)
+        points = list(zip(values[0::2], values[1::2]))
+        rows = [points[row * num_points:(row + 1) * num_points] for row in range(num_rows)]
+        sparkles = self._frame(self.garland_sparkles, frame_num, max(0, num_points - 1))
+        return rows, sparkles
+
+    def to_dict(self) -> dict:
+        """Return the timeline as plain lists: one list of per-frame values per track."""
+        tracks = {
+            'star_brightness': self.star_brightness,
+            'snow_offsets': self.snow_offsets,
+            'ornament_glow': self.ornament_glow,
+            'default_ornament_glow': self.default_glow,
+            'default_ornament_highlight': self.default_highlight,
+            'star': self.star,
+            'light_brightness': self.light_brightness,
+            'light_glow_size': self.light_glow_size,
+            'light_colors': self.light_colors,
+            'garland_points': self.garland_points,
+            'garland_sparkles': self.garland_sparkles,
+        }
+        per_frame = {name: len(track) // self.total_frames for name, track in tracks.items()}
+        return {
+            'total_frames': self.total_frames,
+            'frame_duration': SCENE['frame_duration'],
+            'light_size': self.light_size,
+            'garland_shape': list(self.garland_shape),
+            'tracks': {name: [track[f * per_frame[name]:(f + 1) * per_frame[name]].tolist()
+                              for f in range(self.total_frames)]
+                       for name, track in tracks.items()},
+        }
+
+
+# Timelines of this process by (id(metadata), total_frames), each kept with
+# its metadata so that the id stays valid
+_timelines = {}
+
+
+def animation_timeline(metadata: dict, total_frames: int) -> AnimationTimeline:
+    """Return the AnimationTimeline of a tree, building it on first use in this process."""
+    key = (id(metadata), total_frames)
+    entry = _timelines.get(key)
+    if entry is None or entry[0] is not metadata:
+        if len(_timelines) >= 8:
+            _timelines.clear()
+        entry = _timelines[key] = (metadata, AnimationTimeline(metadata, total_frames))
+    return entry[1]
+
+
+DEFAULT_ORNAMENT_COLORS = [
+    (255, 0, 0), (0, 100, 255), (255, 215, 0),
+    (255, 0, 255), (0, 255, 255), (255, 128, 0)
+]
+
+
+def default_ornament_glow(glow_phase: float) -> tuple:
+    """Return the (glow_intensity, highlight_alpha) of a default ornament at a glow phase."""
+    glow_intensity = 0.8 + 0.2 * math.sin(glow_phase)
+    highlight_alpha = int(80 + 40 * math.sin(glow_phase))
+    return glow_intensity, highlight_alpha
+
+
+@functools.lru_cache(maxsize=64)
+def default_ornament_rings(size: int) -> Image.Image:
+    """Map each pixel of a default ornament to its ring (1 = center, 0 = outside).
+
+    The ornament is a stack of concentric discs, the smallest on top, so the
+    map is drawn the same way with the ring numbers as fill. It is a 'P'
+    image while the rings fit in a palette, an 'I' image beyond that.
+    """
+    radius = size // 2
+    rings = Image.new('P' if radius < 256 else 'I', (size, size), 0)
+    rings_draw = ImageDraw.Draw(rings)
+    for r in range(radius, 0, -1):
+        rings_draw.ellipse([radius - r, radius - r, radius + r, radius + r], fill=r)
+    return rings
+
+
+@functools.lru_cache(maxsize=64)
+def default_ornament_gradient(color: tuple, size: int) -> tuple:
+    """Unlit RGB values of every ring of a default ornament, flattened, ring 1 first."""
+    radius = size // 2
+    values = []
+    for r in range(1, radius + 1):
+        ratio = r / radius
+        values.extend(c * ratio + 255 * (1 - ratio) * 0.3 for c in color)
+    return tuple(values)
+
+
+def create_default_ornament(idx: int, size: int, glow_intensity: float, highlight_alpha: int,
+                            cache: bool = True) -> Image.Image:
+    """Create the colored ornament of slot idx used when there are no images.
+
+    The radial gradient is computed once per color and size; each glow only
+    scales the ring colors and recolors the cached ring map through its
+    palette (or a lookup table per band for very large ornaments). With
+    cache=False the ring map is built for this call only.
+    """
+    color = DEFAULT_ORNAMENT_COLORS[idx % len(DEFAULT_ORNAMENT_COLORS)]
+    rings = default_ornament_rings(size) if cache else default_ornament_rings.__wrapped__(size)
+    lit = bytes(min(255, max(0, int(v * glow_intensity))) for v in default_ornament_gradient(color, size))
+    count = len(lit) // 3
+
+    if rings.mode == 'P':
+        palette = bytearray(4)  # ring 0: transparent
+        for i in range(0, len(lit), 3):
+            palette += lit[i:i + 3] + b'\xff'
+        ornament = rings.copy()
+        ornament.putpalette(palette, 'RGBA')
+        ornament = ornament.convert('RGBA')
+    else:
+        padding = [0] * (65536 - count - 1)
+        bands = [rings.point([0, *lit[band::3], *padding], 'L') for band in range(3)]
+        bands.append(rings.point([0, *[255] * count, *padding], 'L'))
+        ornament = Image.merge('RGBA', bands)
 
-            ornament = Image.new('RGBA', (size, size), (0, 0, 0, 0))
-            ornament_draw = ImageDraw.Draw(ornament)
+    ornament_draw = ImageDraw.Draw(ornament)
+    ornament_draw.ellipse([2, 2, size-3, size-3], outline=(255, 215, 0, 200), width=3)
+    ornament_draw.ellipse([size//3, size//5, size//2, size//3],
+                         fill=(255, 255, 255, highlight_alpha))
+    return ornament
 
-            glow_intensity = 0.8 + 0.2 * math.sin(glow_phase)
 
-            for r in range(size//2, 0, -1):
-                ratio = r / (size//2)
-                c = tuple(int((c * ratio + 255 * (1-ratio) * 0.3) * glow_intensity) for c in color)
-                c = tuple(min(255, max(0, v)) for v in c)
-                ornament_draw.ellipse([size//2-r, size//2-r, size//2+r, size//2+r],
-                                     fill=(*c, 255))
+def create_slot_ornament(idx: int, size: int, glow: tuple, images: list,
+                         use_default: bool, cache: bool = True) -> Image.Image:
+    """Create the ornament of slot idx in a glow state, or None if its image cannot be used.
 
-            ornament_draw.ellipse([2, 2, size-3, size-3], outline=(255, 215, 0, 200), width=3)
-            ornament_draw.ellipse([size//3, size//5, size//2, size//3],
-                                 fill=(255, 255, 255, int(80 + 40 * math.sin(glow_phase))))
+    glow is the (glow_intensity, highlight_alpha) pair of default_ornament_glow
+    or ornament_glow, matching use_default. cache=False keeps the ornament's
+    parts out of the process caches.
+    """
+    if use_default:
+        return create_default_ornament(idx, size, *glow, cache=cache)
 
-            img.paste(ornament, (x - size//2, y - size//2), ornament)
-        else:
-            image_path = images[idx % len(images)]
-            try:
-                ornament = create_circular_ornament(image_path, size, glow_phase)
-                img.paste(ornament, (x - size//2, y - size//2), ornament)
-            except Exception as e:
-                pass
-
-    # Add animated star on top
-    star_size = 100
-    star = create_star(star_size, phase * 2)
-    star_x = metadata['tree_center'] - star_size//2
-    star_y = metadata['tree_top'] - star_size//2 + 10
-    img.paste(star, (star_x, star_y), star)
-
-    # Add animated lights
-    lights = create_animated_lights(width, height, frame_num, metadata['light_positions'])
-    img = Image.alpha_composite(img, lights)
-
-    # Add garland with sparkle animation
-    garland_img = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-    garland_draw = ImageDraw.Draw(garland_img)
-
-    tree_center = metadata['tree_center']
-    tree_top = metadata['tree_top']
-    tree_height = metadata['tree_height']
-    tree_base_width = metadata['tree_base_width']
+    image_path = images[idx % len(images)]
+    if image_rejected(image_path):
+        return None
+    try:
+        return render_circular_ornament(image_path, size, *glow, cache=cache)
+    except Exception as exc:
+        # Damage past the header only shows when decoding
+        reject_image(image_path, str(exc) or type(exc).__name__)
+        return None
 
-    for row in range(1, 6):
-        y_base = tree_top + 50 + (tree_height - 100) * row // 6
-        # Apply same width multiplier: 1.0 at top to 2.0 at bottom
-        width_multiplier = 1.0 + (row / 5)
-        row_width = tree_base_width * row / 6.5 * width_multiplier
 
-        points = []
-        for i in range(15):
-            x = tree_center - row_width//2 + (row_width * i / 14)
-            y = y_base + math.sin(i * 0.8 + phase) * 12
-            points.append((x, y))
+# Thread pools for generate_frame(threads=N), one per thread count, kept for the process
+_frame_pools = {}
 
-        for i in range(len(points) - 1):
-            garland_draw.line([points[i], points[i+1]],
-                            fill=(255, 215, 0, 150), width=2)
-            # Animated sparkles
-            if (i + frame_num) % 3 == 0:
-                sparkle_alpha = int(150 + 100 * math.sin(phase + i))
-                garland_draw.ellipse([points[i][0]-3, points[i][1]-3,
-                                     points[i][0]+3, points[i][1]+3],
-                                    fill=(255, 255, 200, sparkle_alpha))
 
-    img = Image.alpha_composite(img, garland_img)
+def frame_thread_pool(threads: int):
+    """Return this process's thread pool for building the layers of a frame."""
+    pool = _frame_pools.get(threads)
+    if pool is None:
+        pool = _frame_pools[threads] = futures.ThreadPoolExecutor(max_workers=threads,
+                                                                  thread_name_prefix='frame-layer')
+    return pool
 
-    # Add text
-    img = add_text(img, width, height)
 
-    # Vignette
-    vignette = Image.new('RGBA', (width, height), (0, 0, 0, 0))
-    vignette_draw = ImageDraw.Draw(vignette)
-    for i in range(30):
-        alpha = int(4 * i)
-        margin = i * 15
-        vignette_draw.rectangle([margin, margin, width-margin, height-margin],
-                               outline=(0, 0, 0, alpha))
+def generate_frame(base_img: Image.Image, metadata: dict, frame_num: int,
+                   total_frames: int, ornaments: list, images: list, use_default: bool,
+                   backend: str = 'auto', sprite_levels: int = None, threads: int = 1) -> Image.Image:
+    """Generate a single animation frame.
+
+    ornaments is not used; it is kept for callers of the original signature.
+    backend selects how lights, twinkling stars and the star glow are drawn
+    (see RENDER_BACKENDS). With sprite_levels, lights and the star are
+    blitted from the SpriteAtlas with that many levels instead.
+
+    With threads > 1 the animated layers (stars, snow, each ornament, the
+    star, lights and garland) are built concurrently in a thread pool and
+    then composited in the usual order. The frame is the same either way;
+    whether it is faster depends on how much of the drawing runs outside
+    the GIL, so measure with --profile before relying on it.
+    """
 
-    img = Image.alpha_composite(img, vignette)
+    width, height = base_img.size
+    with profile_stage('static_layers'):
+        static_layers = create_static_layers(width, height)
+    with profile_stage('frame.base'):
+        img = base_img.copy()
+
+    timeline = animation_timeline(metadata, total_frames)
+    sx, sy, s = scene_scale(width, height)
+    atlas = sprite_atlas(sprite_levels) if sprite_levels else None
+
+    # Animated layers only cover part of the canvas: draw each one into a
+    # reusable buffer of its own box and composite just that region. The
+    # buffers belong to the calling thread, so frames can be rendered from
+    # several threads at once (layer builders in the pool use them too).
+    boxes = animated_layer_boxes(metadata, static_layers, width, height)
+    buffers = layer_buffers()
+
+    # Twinkling stars
+    def build_stars():
+        stars = _layer_buffer(buffers, 'stars', boxes['stars'])
+        draw_star_dots(stars.image, stars.origin, metadata['star_positions'][:SCENE['twinkling_stars']],
+                       timeline.star_brightness_at(frame_num), backend, star_dot_size(s))
+        return stars
+
+    # Snowflakes with slight movement
+    def build_snow():
+        snow = _layer_buffer(buffers, 'snow', boxes['snow'])
+        ox, oy = snow.origin
+        offsets = timeline.snow_offsets_at(frame_num)
+        for (x, y, snowflake), y_offset in zip(static_layers['snowflakes'], offsets):
+            snow.image.paste(snowflake, (x - ox, y + y_offset - oy), snowflake)
+        return snow
+
+    # Ornaments with glow animation
+    def build_ornament(idx, size):
+        return create_slot_ornament(idx, size, timeline.ornament_state(frame_num, idx, use_default),
+                                    images, use_default)
+
+    # Animated star on top
+    star_size = scaled_size(SCENE['star_size'], s, 12)
+
+    def build_star():
+        if atlas:
+            return atlas.star(timeline.phase(frame_num) * 2, star_size)
+        return render_star(star_size, *timeline.star_state(frame_num), backend=backend)
+
+    # Animated lights
+    def build_lights():
+        lights = _layer_buffer(buffers, 'lights', boxes['lights'])
+        if atlas:
+            blit_lights(lights.image, lights.origin, metadata['light_positions'],
+                        timeline.light_states(frame_num), atlas, s)
+        else:
+            draw_lights(lights.image, lights.origin, metadata['light_positions'],
+                        timeline.light_states(frame_num), backend, timeline.light_size)
+        return lights
+
+    # Garland with sparkle animation
+    def build_garland():
+        garland = _layer_buffer(buffers, 'garland', boxes['garland'])
+        rows, sparkles = timeline.garland(frame_num)
+        draw_garland_rows(garland.image, garland.origin, rows, sparkles, s)
+        return garland
+
+    slots = list(enumerate(zip(metadata['ornament_positions'], metadata['ornament_sizes'])))
+    builders = {'stars': build_stars if boxes['stars'] else None,
+                'snow': build_snow if boxes['snow'] else None,
+                'star': build_star,
+                'lights': build_lights if boxes['lights'] else None,
+                'garland': build_garland if boxes['garland'] else None}
+    builders.update({('ornament', idx): functools.partial(build_ornament, idx, size)
+                     for idx, (_, size) in slots})
+
+    if threads > 1:
+        pool = frame_thread_pool(threads)
+        pending = {name: pool.submit(build) for name, build in builders.items() if build}
+
+        def layer(name):
+            return pending[name].result() if name in pending else None
+    else:
+        def layer(name):
+            return builders[name]() if builders[name] else None
+
+    for name in ('stars', 'snow'):
+        with profile_stage(f'frame.{name}'):
+            buffer = layer(name)
+            if buffer:
+                buffer.composite_onto(img)
+
+    with profile_stage('frame.ornaments'):
+        for idx, ((x, y), size) in slots:
+            ornament = layer(('ornament', idx))
+            if ornament is None:
+                continue
+            img.paste(ornament, (x - size//2, y - size//2), ornament)
 
-    return img.convert('RGB')
+    with profile_stage('frame.star'):
+        star = layer('star')
+        star_x = metadata['tree_center'] - star_size//2
+        star_y = metadata['tree_top'] - star_size//2 + int(round(10 * sy))
+        img.paste(star, (star_x, star_y), star)
 
+    for name in ('lights', 'garland'):
+        with profile_stage(f'frame.{name}'):
+            buffer = layer(name)
+            if buffer:
+                buffer.composite_onto(img)
 
-def generate_christmas_tree_gif(folder_path: str = ".", output_path: str = "christmas_tree.gif"):
-    """Generate the animated Christmas tree GIF."""
+    # Add text
+    with profile_stage('frame.text'):
+        img = add_text(img, width, height)
 
-    # Find images
-    images = find_images(folder_path)
+    # Vignette
+    with profile_stage('frame.vignette'):
+        img.alpha_composite(static_layers['vignette'])
+        frame = img.convert('RGB')
+
+    return frame
+
+
+def _same_image(a: Image.Image, b: Image.Image) -> bool:
+    """Return whether two images have identical pixels."""
+    if a is b:
+        return True
+    if a.mode != b.mode or a.size != b.size:
+        return False
+    return ImageChops.subtract_modulo(a, b).getbbox(alpha_only=False) is None
+
+
+class AnimationWriter:
+    """Incremental animation encoder.
+
+    Each frame is encoded and written as soon as the next one differs from
+    it, so memory use is bounded by two frames no matter how long the
+    animation is. Identical consecutive frames are merged into one frame
+    shown for their total duration (unless merge_repeats is off).
+    Subclasses encode one frame with Pillow's still-image encoder and splice
+    the result into the animated container.
+    """
+
+    def __init__(self, output_file: str, size: tuple, duration: int, loop: int = 0,
+                 num_frames: int = None, merge_repeats: bool = True):
+        self.output_file = output_file
+        self.size = size
+        self.duration = duration
+        self.loop = loop
+        self.num_frames = num_frames
+        self.merge_repeats = merge_repeats
+        self.frame_count = 0
+        self.merged_frames = 0
+        self._held = None
+        self._held_duration = 0
+        self.fp = self._open(output_file)
+
+    def _open(self, output_file: str):
+        return open(output_file, 'wb')
+
+    def add_frame(self, frame: Image.Image, duration: int = None):
+        """Add one frame, shown for duration ms (default: the animation's frame duration)."""
+        if frame.size != self.size:
+            raise ValueError(f"frame size {frame.size} does not match animation size {self.size}")
+        duration = self.duration if duration is None else duration
+        if self._held is not None:
+            if self.merge_repeats and _same_image(frame, self._held):
+                self._held_duration += duration
+                self.merged_frames += 1
+                return
+            self._flush()
+        self._held, self._held_duration = frame, duration
+
+    def _flush(self):
+        self._write_frame(self._held, self._held_duration)
+        self.frame_count += 1
+        self._held = None
+
+    def close(self):
+        """Write the last frame, finish the container and close the output file."""
+        if self.fp.closed:
+            return
+        try:
+            if self._held is not None:
+                self._flush()
+            self._finish()
+        finally:
+            self.fp.close()
+
+    def _write_frame(self, frame: Image.Image, duration: int):
+        raise NotImplementedError
+
+    def _finish(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _split_gif(data: bytes) -> tuple:
+    """Split a single-frame GIF into (color table size bits, color table, image data)."""
+    packed = data[10]
+    pos = 13
+    table_bits, table = 0, b''
+    if packed & 0x80:
+        table_bits = packed & 0x07
+        table = data[pos:pos + 3 * (2 << table_bits)]
+        pos += len(table)
+    while data[pos] == 0x21:  # Skip extension blocks
+        pos += 2
+        while data[pos]:
+            pos += data[pos] + 1
+        pos += 1
+    if data[pos] != 0x2C:
+        raise ValueError("no image descriptor in GIF data")
+    flags = data[pos + 9]
+    pos += 10
+    if flags & 0x80:  # Local color table takes precedence
+        table_bits = flags & 0x07
+        table = data[pos:pos + 3 * (2 << table_bits)]
+        pos += len(table)
+    # Image data runs up to the trailer
+    return table_bits, table, data[pos:data.rindex(b';')]
+
+
+class GifWriter(AnimationWriter):
+    """Animated GIF encoder.
+
+    By default one global palette is taken from the first frame, which already
+    shows every kind of scene element, and each later frame only stores the
+    bounding box of the pixels that changed, with unchanged pixels in the box
+    left transparent. With optimize=False every frame is written in full with
+    its own adaptive palette.
+    """
+
+    # Palette index reserved for unchanged pixels in delta frames
+    TRANSPARENT_INDEX = 255
+
+    def __init__(self, *args, optimize: bool = True, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.optimize = optimize
+        self.palette_image = None
+        self.previous = None
+
+    def _write_frame(self, frame: Image.Image, duration: int):
+        frame = frame.convert('RGB')
+        if self.frame_count == 0:
+            self._write_header(frame)
+
+        if not self.optimize:
+            indexed = frame.convert('P', palette=Image.ADAPTIVE)
+            self._write_image(indexed, (0, 0), duration, disposal=0, transparency=False, local_palette=True)
+            return
+
+        indexed = frame.quantize(palette=self.palette_image, dither=Image.NONE)
+        if self.previous is None:
+            self._write_image(indexed, (0, 0), duration, disposal=1, transparency=False)
+        else:
+            delta = ImageChops.subtract_modulo(indexed, self.previous)
+            box = delta.getbbox(alpha_only=False)
+            if box is None:
+                # Nothing changed: a single transparent pixel keeps the timing
+                box = (0, 0, 1, 1)
+                patch = Image.new('P', (1, 1), self.TRANSPARENT_INDEX)
+                patch.putpalette(self.palette_image.getpalette())
+            else:
+                patch = indexed.crop(box)
+                unchanged = Image.frombytes('L', patch.size, delta.crop(box).tobytes())
+                patch.paste(self.TRANSPARENT_INDEX, mask=unchanged.point([255] + [0] * 255))
+            self._write_image(patch, box[:2], duration, disposal=1, transparency=True)
+        self.previous = indexed
+
+    def _write_header(self, first_frame: Image.Image):
+        width, height = self.size
+        if self.optimize:
+            # 255 colours, leaving the last index free for transparency
+            quantized = first_frame.quantize(colors=255, method=Image.MEDIANCUT)
+            self.palette_image = Image.new('P', (1, 1))
+            self.palette_image.putpalette(quantized.getpalette()[:3 * 255])
+            global_table = bytes(self.palette_image.getpalette()).ljust(3 * 256, b'\x00')
+            self.fp.write(b'GIF89a' + struct.pack('<HHBBB', width, height, 0xF7, 0, 0))
+            self.fp.write(global_table)
+        else:
+            # No global color table, every frame has its own
+            self.fp.write(b'GIF89a' + struct.pack('<HHBBB', width, height, 0x70, 0, 0))
+        self.fp.write(b'!\xff\x0bNETSCAPE2.0\x03\x01' + struct.pack('<H', self.loop) + b'\x00')
+
+    def _write_image(self, indexed: Image.Image, offset: tuple, duration: int, disposal: int,
+                     transparency: bool, local_palette: bool = False):
+        buffer = io.BytesIO()
+        indexed.save(buffer, 'GIF', interlace=False, optimize=False)
+        table_bits, table, image_data = _split_gif(buffer.getvalue())
+
+        # Graphic control extension: disposal method, frame delay in 1/100 s, transparency
+        packed = (disposal << 2) | (1 if transparency else 0)
+        self.fp.write(b'!\xf9\x04' + struct.pack('<BHB', packed, round(duration / 10),
+                                                  self.TRANSPARENT_INDEX if transparency else 0)
+                      + b'\x00')
+        flags = (0x80 | table_bits) if local_palette else 0
+        self.fp.write(b',' + struct.pack('<HHHHB', offset[0], offset[1],
+                                         indexed.width, indexed.height, flags))
+        if local_palette:
+            self.fp.write(table)
+        self.fp.write(image_data)
+
+    def _finish(self):
+        self.fp.write(b';')
+
+
+def _png_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    """Serialize a PNG chunk."""
+    return (struct.pack('>I', len(data)) + chunk_type + data +
+            struct.pack('>I', zlib.crc32(chunk_type + data) & 0xffffffff))
+
+
+def _iter_png_chunks(data: bytes):
+    """Yield (type, data) for each chunk of a PNG file."""
+    pos = 8
+    while pos < len(data):
+        length, chunk_type = struct.unpack('>I4s', data[pos:pos + 8])
+        yield chunk_type, data[pos + 8:pos + 8 + length]
+        pos += length + 12
+
+
+def _png_software_chunk() -> bytes:
+    """The tEXt chunk that marks a PNG as written by this script."""
+    return _png_chunk(b'tEXt', b'Software\0' + OUTPUT_SOFTWARE.encode('latin-1'))
+
+
+class ApngWriter(AnimationWriter):
+    """Animated PNG encoder (lossless, full colour)."""
+
+    def _write_frame(self, frame: Image.Image, duration: int):
+        buffer = io.BytesIO()
+        frame.convert('RGB').save(buffer, 'PNG')
+        chunks = list(_iter_png_chunks(buffer.getvalue()))
+
+        if self.frame_count == 0:
+            self.sequence = 0
+            self.fp.write(b'\x89PNG\r\n\x1a\n')
+            self.fp.write(_png_chunk(b'IHDR', dict(chunks)[b'IHDR']))
+            self.fp.write(_png_software_chunk())
+            self.actl_offset = self.fp.tell()
+            self.fp.write(_png_chunk(b'acTL', struct.pack('>II', self.num_frames or 1, self.loop)))
+
+        width, height = self.size
+        self.fp.write(_png_chunk(b'fcTL', struct.pack('>IIIIIHHBB', self.sequence, width, height,
+                                                      0, 0, duration, 1000, 0, 0)))
+        self.sequence += 1
+        for chunk_type, data in chunks:
+            if chunk_type != b'IDAT':
+                continue
+            if self.frame_count == 0:
+                self.fp.write(_png_chunk(b'IDAT', data))
+            else:
+                self.fp.write(_png_chunk(b'fdAT', struct.pack('>I', self.sequence) + data))
+                self.sequence += 1
+
+    def _finish(self):
+        self.fp.write(_png_chunk(b'IEND', b''))
+        if self.frame_count and self.frame_count != self.num_frames:
+            # Frame count was not known up front: patch the animation control chunk
+            self.fp.seek(self.actl_offset)
+            self.fp.write(_png_chunk(b'acTL', struct.pack('>II', self.frame_count, self.loop)))
+
+
+class PngStripWriter:
+    """Writes an RGB PNG a strip of rows at a time, so the image is never held whole.
+
+    Each row is Up-filtered against the row above it (carried over from the
+    previous strip) and deflated incrementally; compressed data is written
+    as IDAT chunks as soon as zlib produces it.
+    """
+
+    def __init__(self, output_file: str, size: tuple, level: int = 6):
+        self.size = size
+        self.rows_written = 0
+        self.fp = open(output_file, 'wb')
+        self._compressor = zlib.compressobj(level)
+        self._previous = Image.new('RGB', (size[0], 1))  # PNG filters see zeros above the first row
+        self.fp.write(b'\x89PNG\r\n\x1a\n')
+        self.fp.write(_png_chunk(b'IHDR', struct.pack('>IIBBBBB', *size, 8, 2, 0, 0, 0)))
+        self.fp.write(_png_software_chunk())
+
+    def write(self, strip: Image.Image):
+        """Append the rows of an RGB strip as wide as the image."""
+        width, rows = strip.size
+        if width != self.size[0] or self.rows_written + rows > self.size[1]:
+            raise ValueError(f"a {width}x{rows} strip does not fit the {self.size[0]}x{self.size[1]} "
+                             f"image after {self.rows_written} rows")
+        above = Image.new('RGB', strip.size)
+        above.paste(self._previous, (0, 0))
+        above.paste(strip.crop((0, 0, width, rows - 1)), (0, 1))
+        filtered = ImageChops.subtract_modulo(strip, above).tobytes()
+        stride = 3 * width
+        self._write_idat(self._compressor.compress(
+            b''.join(b'\x02' + filtered[i:i + stride] for i in range(0, len(filtered), stride))))
+        self._previous = strip.crop((0, rows - 1, width, rows))
+        self.rows_written += rows
+
+    def _write_idat(self, data: bytes):
+        if data:
+            self.fp.write(_png_chunk(b'IDAT', data))
+
+    def close(self):
+        """Finish the compressed stream and the file."""
+        if self.fp.closed:
+            return
+        try:
+            self._write_idat(self._compressor.flush())
+            self.fp.write(_png_chunk(b'IEND', b''))
+        finally:
+            self.fp.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+def _riff_chunk(chunk_type: bytes, data: bytes) -> bytes:
+    """Serialize a RIFF chunk, padded to an even length."""
+    return chunk_type + struct.pack('<I', len(data)) + data + b'\x00' * (len(data) & 1)
+
+
+class WebpWriter(AnimationWriter):
+    """Animated WebP encoder."""
+
+    def __init__(self, *args, quality: int = 80, lossless: bool = False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.quality = quality
+        self.lossless = lossless
+
+    def _write_frame(self, frame: Image.Image, duration: int):
+        if self.frame_count == 0:
+            width, height = self.size
+            self.fp.write(b'RIFF\x00\x00\x00\x00WEBP')  # Size is patched on close
+            canvas = (width - 1).to_bytes(3, 'little') + (height - 1).to_bytes(3, 'little')
+            self.fp.write(_riff_chunk(b'VP8X', b'\x02\x00\x00\x00' + canvas))  # Animation flag
+            self.fp.write(_riff_chunk(b'ANIM', struct.pack('<IH', 0, self.loop)))
+
+        buffer = io.BytesIO()
+        frame.convert('RGB').save(buffer, 'WEBP', quality=self.quality, lossless=self.lossless)
+        data = buffer.getvalue()
+
+        # Keep the bitstream chunks of the still image
+        bitstream = b''
+        pos = 12
+        while pos < len(data):
+            chunk_type, length = struct.unpack('<4sI', data[pos:pos + 8])
+            if chunk_type in (b'ALPH', b'VP8 ', b'VP8L'):
+                bitstream += data[pos:pos + 8 + length + (length & 1)]
+            pos += 8 + length + (length & 1)
+
+        header = (b'\x00' * 6 +  # Frame offset (0, 0)
+                  (frame.width - 1).to_bytes(3, 'little') +
+                  (frame.height - 1).to_bytes(3, 'little') +
+                  duration.to_bytes(3, 'little') +
+                  b'\x02')  # No blending, no disposal
+        self.fp.write(_riff_chunk(b'ANMF', header + bitstream))
+
+    def _finish(self):
+        riff_size = self.fp.tell() - 8
+        self.fp.seek(4)
+        self.fp.write(struct.pack('<I', riff_size))
+
+
+def frame_rate(duration: int) -> tuple:
+    """Return the frame rate of a frame duration in ms as a reduced (numerator, denominator)."""
+    divisor = math.gcd(1000, duration)
+    return 1000 // divisor, duration // divisor
+
+
+class FrameStreamWriter(AnimationWriter):
+    """Uncompressed frame stream for another program to encode.
+
+    Frames are written as soon as they are added, at the constant rate of
+    one frame per duration ms: a frame shown for longer is repeated. The
+    output may be a file, a named pipe or '-' for standard output.
+    Subclasses provide the stream header and the encoding of one frame.
+    """
+
+    def __init__(self, output_file: str, size: tuple, duration: int, loop: int = 0,
+                 num_frames: int = None, merge_repeats: bool = False):
+        super().__init__(output_file, size, duration, loop, num_frames, merge_repeats)
+        self.fp.write(self._header())
+        self.fp.flush()
+
+    def _open(self, output_file: str):
+        if output_file == '-':
+            return open(sys.__stdout__.fileno(), 'wb', closefd=False)
+        return super()._open(output_file)
+
+    def add_frame(self, frame: Image.Image, duration: int = None):
+        super().add_frame(frame, duration)
+        self._flush()
+
+    def _write_frame(self, frame: Image.Image, duration: int):
+        data = self._encode_frame(frame)
+        for _ in range(max(1, round(duration / self.duration))):
+            self.fp.write(data)
+        self.fp.flush()
+
+    def _header(self) -> bytes:
+        return b''
+
+    def _encode_frame(self, frame: Image.Image) -> bytes:
+        raise NotImplementedError
+
+
+class Y4mWriter(FrameStreamWriter):
+    """YUV4MPEG2 stream of 4:4:4 full-range BT.601 Y'CbCr frames (Pillow's YCbCr)."""
+
+    def _header(self) -> bytes:
+        numerator, denominator = frame_rate(self.duration)
+        width, height = self.size
+        return (f"YUV4MPEG2 W{width} H{height} F{numerator}:{denominator} Ip A1:1 C444 "
+                f"XCOLORRANGE=FULL\n").encode('ascii')
+
+    def _encode_frame(self, frame: Image.Image) -> bytes:
+        planes = frame.convert('RGB').convert('YCbCr').split()
+        return b'FRAME\n' + b''.join(plane.tobytes() for plane in planes)
+
+
+class RawRgbWriter(FrameStreamWriter):
+    """Headerless stream of packed 8-bit RGB frames (rgb24), one after the other."""
+
+    def _encode_frame(self, frame: Image.Image) -> bytes:
+        return frame.convert('RGB').tobytes()
+
+
+ANIMATION_WRITERS = {
+    '.gif': GifWriter,
+    '.png': ApngWriter,
+    '.apng': ApngWriter,
+    '.webp': WebpWriter,
+    '.y4m': Y4mWriter,
+    '.rgb': RawRgbWriter,
+}
+
+# Frame streams for other programs: they can go to a pipe, so they are never cached
+STREAM_FORMATS = ('.y4m', '.rgb')
+
+
+def output_format(output_file: str, file_format: str = None) -> str:
+    """Return the writer extension for an output file.
+
+    file_format (e.g. 'y4m') overrides the file's extension; '-' (standard
+    output) defaults to a Y4M stream.
+    """
+    if file_format:
+        return '.' + file_format.lower().lstrip('.')
+    if output_file == '-':
+        return '.y4m'
+    return os.path.splitext(output_file)[1].lower()
+
+
+def open_animation_writer(output_file: str, size: tuple, duration: int, loop: int = 0,
+                          num_frames: int = None, file_format: str = None, **options) -> AnimationWriter:
+    """Open a streaming animation writer chosen by file_format or the output file extension."""
+    extension = output_format(output_file, file_format)
+    try:
+        writer_class = ANIMATION_WRITERS[extension]
+    except KeyError:
+        raise ValueError(f"Unsupported animation format '{extension}' "
+                         f"(use one of {', '.join(ANIMATION_WRITERS)})") from None
+    if output_file == '-' and extension not in STREAM_FORMATS:
+        raise ValueError(f"Only {' and '.join(STREAM_FORMATS)} frame streams can be written "
+                         f"to standard output")
+    return writer_class(output_file, size, duration, loop, num_frames, **options)
+
+
+# Bump whenever a change alters rendered output, so old cache entries are not reused
+RENDERER_VERSION = 4
+
+# Seed of the random scene layout, for a consistent tree appearance
+SCENE_SEED = 123
+
+
+def default_cache_dir() -> str:
+    """Return the render cache folder ($XMASTREE_CACHE_DIR or ~/.cache/stargazers-xmastree)."""
+    return os.environ.get('XMASTREE_CACHE_DIR') or os.path.join(
+        os.path.expanduser('~'), '.cache', 'stargazers-xmastree')
+
+
+def _replace_atomically(path: str, write):
+    """Create path by calling write(fp) on a temporary file and renaming it into place."""
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with open(temp_path, 'wb') as fp:
+            write(fp)
+        os.replace(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+
+
+def file_sha256(path: str) -> str:
+    """Return the SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+# Most disk space the render cache keeps in finished renders and ornament
+# bodies; beyond it the least recently used files are removed
+CACHE_MAX_BYTES = 1024 * 1024 * 1024
+CACHE_PRUNED_FOLDERS = ('renders', 'ornaments')
+
+
+class RenderCache:
+    """On-disk, content-addressed cache of finished renders and ornament bodies.
+
+    Renders are keyed on a hash of everything that affects the output: the
+    content hashes of the ornament images in order, canvas size, frame count
+    and duration, scene seed, render backend, output format and
+    RENDERER_VERSION. Ornament bodies are keyed on image content and size,
+    so replacing one image only decodes that image again. File hashes are
+    remembered per (path, mtime, size) so unchanged files are not re-read.
+
+    Every stored render prunes renders and ornament bodies, least recently
+    used first, until they take at most max_bytes. New file hashes are
+    merged into the shared index once per render (save_digests), so
+    processes using the same cache keep each other's entries.
+    """
+
+    def __init__(self, root: str = None, max_bytes: int = CACHE_MAX_BYTES):
+        self.root = root or default_cache_dir()
+        self.max_bytes = max_bytes
+        self._digests = None
+        self._new_digests = {}
+        self._lock = threading.Lock()
+
+    def _path(self, *parts) -> str:
+        path = os.path.join(self.root, *parts)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path
+
+    def _read_digests(self) -> dict:
+        try:
+            with open(os.path.join(self.root, 'file_digests.json')) as fp:
+                return json.load(fp)
+        except (OSError, ValueError):
+            return {}
+
+    def file_digest(self, image_path: str) -> str:
+        """Return the SHA-256 of a file's content, reusing it while the file is unchanged."""
+        stat = os.stat(image_path)
+        path = os.path.abspath(image_path)
+        stamp = [stat.st_mtime_ns, stat.st_size]
+        with self._lock:
+            if self._digests is None:
+                self._digests = self._read_digests()
+            entry = self._digests.get(path)
+        if entry and entry[:2] == stamp:
+            return entry[2]
+
+        digest = file_sha256(image_path)
+        with self._lock:
+            self._digests[path] = self._new_digests[path] = stamp + [digest]
+        return digest
+
+    def save_digests(self):
+        """Merge the file hashes computed since the last call into the on-disk index."""
+        with self._lock:
+            if not self._new_digests:
+                return
+            digests = self._read_digests()
+            digests.update(self._new_digests)
+            # Forget files that are gone, so the index does not grow forever
+            digests = {path: entry for path, entry in digests.items() if os.path.exists(path)}
+            _replace_atomically(self._path('file_digests.json'),
+                                lambda fp: fp.write(json.dumps(digests).encode()))
+            self._digests = digests
+            self._new_digests = {}
+
+    def prune(self):
+        """Remove the least recently used renders and ornament bodies beyond max_bytes."""
+        entries = []
+        for folder in CACHE_PRUNED_FOLDERS:
+            try:
+                scan = list(os.scandir(os.path.join(self.root, folder)))
+            except OSError:
+                continue
+            for entry in scan:
+                if entry.name.endswith('.tmp'):
+                    continue
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        total = 0
+        for _, file_size, path in sorted(entries, reverse=True):
+            total += file_size
+            if total > self.max_bytes:
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+
+    @staticmethod
+    def _touch(path: str):
+        """Mark a cached file as used, for prune."""
+        with contextlib.suppress(OSError):
+            os.utime(path)
+
+    def render_key(self, images: list, **params) -> str:
+        """Return the cache key of a render of images (in ornament order) with params."""
+        description = {
+            'renderer_version': RENDERER_VERSION,
+            'images': [self.file_digest(img) for img in images],
+            'params': params,
+        }
+        self.save_digests()
+        return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+    def lookup(self, key: str, extension: str):
+        """Return the path of a cached render, or None."""
+        path = os.path.join(self.root, 'renders', key + extension)
+        if not os.path.exists(path):
+            return None
+        self._touch(path)
+        return path
+
+    def store(self, key: str, extension: str, output_file: str):
+        """Copy a finished render into the cache, then prune the cache."""
+        with open(output_file, 'rb') as src:
+            _replace_atomically(self._path('renders', key + extension),
+                                lambda fp: shutil.copyfileobj(src, fp))
+        self.save_digests()
+        self.prune()
+
+    def atlas_path(self, levels: int) -> str:
+        """Path of the cached SpriteAtlas with the given number of levels."""
+        return self._path('atlases', f"sprites-{levels}-v{RENDERER_VERSION}.png")
+
+    def load_ornament_body(self, image_path: str, size: int) -> Image.Image:
+        """load_ornament_body, reusing the body rendered for the same content and size."""
+        path = self._path('ornaments', f"{self.file_digest(image_path)}-{size}-v{RENDERER_VERSION}.png")
+        try:
+            with Image.open(path) as cached:
+                cached.load()
+            self._touch(path)
+            return cached
+        except OSError:
+            pass
+        body = load_ornament_body(image_path, size)
+        _replace_atomically(path, lambda fp: body.save(fp, 'PNG'))
+        return body
+
+
+# Render cache used by this process (None for no disk cache)
+_render_cache = None
+
+
+def use_render_cache(cache: RenderCache = None):
+    """Make this process load ornament bodies and sprite atlases through cache (None for no disk cache)."""
+    global _render_cache
+    _render_cache = cache
+    _ornament_cache.loader = cache.load_ornament_body if cache else load_ornament_body
+
+
+SPOOL_FORMAT = 'stargazers-xmastree-spool/1'
+
+
+def metadata_digest(metadata: dict) -> str:
+    """Return a SHA-256 of base tree metadata, to tell whether two renders share a layout."""
+    text = json.dumps(metadata, sort_keys=True, default=list)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+class FrameSpool:
+    """On-disk store of the rendered frames of one animation, so a stopped render can resume.
+
+    Each frame is saved to its own file as soon as it is rendered: raw RGB
+    pixels, read back through a memory map, or a PNG with compress=True.
+    Files are renamed into place once written, so a render killed at any
+    point leaves only whole frames. manifest.json records the scene seed,
+    a digest of the tree metadata and the render parameters; a spool left
+    by a render with a different manifest is emptied first.
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, root: str, size: tuple, num_frames: int, compress: bool = False, **params):
+        self.root = root
+        self.size = tuple(size)
+        self.compress = compress
+        self.extension = '.png' if compress else '.raw'
+        self.manifest = json.loads(json.dumps({
+            'format': SPOOL_FORMAT,
+            'renderer_version': RENDERER_VERSION,
+            'size': size,
+            'num_frames': num_frames,
+            'compress': compress,
+            'params': params,
+        }, sort_keys=True))
+
+        os.makedirs(root, exist_ok=True)
+        manifest_path = os.path.join(root, self.MANIFEST)
+        try:
+            with open(manifest_path, encoding='utf-8') as fp:
+                previous = json.load(fp)
+        except (OSError, ValueError):
+            previous = None
+        if previous != self.manifest:
+            self.clear()
+            text = json.dumps(self.manifest, indent=2, sort_keys=True) + '\n'
+            _replace_atomically(manifest_path, lambda fp: fp.write(text.encode()))
+        else:
+            self.clear('.tmp')
+        self.done = {frame_num for frame_num in range(num_frames) if self._complete(frame_num)}
+
+    def _frame_path(self, frame_num: int) -> str:
+        return os.path.join(self.root, f"frame-{frame_num:05d}{self.extension}")
+
+    def _complete(self, frame_num: int) -> bool:
+        try:
+            file_size = os.path.getsize(self._frame_path(frame_num))
+        except OSError:
+            return False
+        return file_size > 0 if self.compress else file_size == self.size[0] * self.size[1] * 3
+
+    def __contains__(self, frame_num: int) -> bool:
+        return frame_num in self.done
+
+    def clear(self, suffix: str = ''):
+        """Remove every frame file ending in suffix ('.tmp': partial writes of a killed render)."""
+        for path in glob.glob(os.path.join(glob.escape(self.root), 'frame-*' + suffix)):
+            os.remove(path)
+
+    def store(self, frame_num: int, frame: Image.Image):
+        """Save a rendered frame."""
+        frame = frame.convert('RGB')
+        if self.compress:
+            _replace_atomically(self._frame_path(frame_num),
+                                lambda fp: frame.save(fp, 'PNG', compress_level=1))
+        else:
+            _replace_atomically(self._frame_path(frame_num), lambda fp: fp.write(frame.tobytes()))
+        self.done.add(frame_num)
+
+    def load(self, frame_num: int) -> Image.Image:
+        """Return a stored frame."""
+        path = self._frame_path(frame_num)
+        if self.compress:
+            with Image.open(path) as frame:
+                frame.load()
+                return frame
+        with open(path, 'rb') as fp:
+            pixels = mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ)
+        return Image.frombuffer('RGB', self.size, pixels, 'raw', 'RGB', 0, 1)
+
+
+# Per-process state of frame-rendering workers, set up once by _init_frame_worker
+_worker_state = {}
+
+
+def _init_frame_worker(shm_name: str, size: tuple, metadata: dict, total_frames: int,
+                       images: list, use_default: bool, frame_options: dict, cache_dir: str):
+    """Attach a worker process to the shared base image and keep the frame inputs."""
+    use_render_cache(RenderCache(cache_dir) if cache_dir else None)
+    shm = shared_memory.SharedMemory(name=shm_name)
+    base_img = Image.frombuffer('RGBA', size, shm.buf, 'raw', 'RGBA', 0, 1)
+    _worker_state.update(shm=shm, base_img=base_img, metadata=metadata,
+                         total_frames=total_frames, images=images, use_default=use_default,
+                         frame_options=frame_options)
+
+
+def _render_frame_in_worker(frame_num: int) -> Image.Image:
+    """Render one frame from the inputs shipped by _init_frame_worker."""
+    state = _worker_state
+    return generate_frame(state['base_img'], state['metadata'], frame_num, state['total_frames'],
+                          None, state['images'], state['use_default'], **state['frame_options'])
+
+
+def iter_frames(base_img: Image.Image, metadata: dict, total_frames: int, images: list,
+                use_default: bool, workers: int = 1, spool: FrameSpool = None, **frame_options):
+    """Yield the animation frames in order, rendering them in a process pool if workers > 1.
+
+    frame_options are passed on to generate_frame. With a FrameSpool,
+    frames already in the spool are loaded from it, and newly rendered ones
+    are saved to it.
+    """
+    spooled = spool.done.copy() if spool else set()
+    rendered = _render_frames(base_img, metadata, total_frames,
+                              [frame_num for frame_num in range(total_frames) if frame_num not in spooled],
+                              images, use_default, workers, **frame_options)
+    for frame_num in range(total_frames):
+        if frame_num in spooled:
+            frame = spool.load(frame_num)
+        else:
+            frame = next(rendered)
+            if spool:
+                with profile_stage('spool'):
+                    spool.store(frame_num, frame)
+        yield frame
+
+
+def _render_frames(base_img: Image.Image, metadata: dict, total_frames: int, frame_nums: list,
+                   images: list, use_default: bool, workers: int = 1, **frame_options):
+    """Yield the given frames in order, rendering them in a process pool if workers > 1.
+
+    The base image is copied once into shared memory and the metadata is sent
+    once per worker, so each task only carries its frame number. At most
+    2 * workers frames are in flight or waiting to be consumed.
+    """
+    if workers <= 1:
+        for frame_num in frame_nums:
+            yield generate_frame(base_img, metadata, frame_num, total_frames,
+                                 None, images, use_default, **frame_options)
+        return
+
+    cache_dir = _render_cache.root if _render_cache else None
+
+    base_img = base_img.convert('RGBA')
+    raw = base_img.tobytes()
+    shm = shared_memory.SharedMemory(create=True, size=len(raw))
+    try:
+        shm.buf[:len(raw)] = raw
+        del raw
+        with futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_frame_worker,
+                                         initargs=(shm.name, base_img.size, metadata, total_frames,
+                                                   images, use_default, frame_options, cache_dir)) as pool:
+            pending = deque()
+            queued = iter(frame_nums)
+            for frame_num in queued:
+                pending.append(pool.submit(_render_frame_in_worker, frame_num))
+                if len(pending) >= 2 * workers:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _timed_iter(stage: str, iterable):
+    """Yield from iterable, timing each item's production as one call of stage."""
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            item = next(iterator)
+        except StopIteration:
+            return
+        if _profiler is not None:
+            _profiler.add(stage, time.perf_counter() - start)
+        yield item
+
+
+def generate_christmas_tree_gif(folder_path: str = ".", output_path: str = "christmas_tree.gif",
+                                workers: int = 1, num_frames: int = SCENE['frame_count'],
+                                backend: str = 'auto', size: tuple = REFERENCE_SIZE,
+                                cache: RenderCache = None, sprite_levels: int = None,
+                                threads: int = 1, progress=None, file_format: str = None,
+                                spool_dir: str = None, spool_compress: bool = False):
+    """Generate the animated Christmas tree GIF.
+
+    The output format follows file_format or the extension of output_path
+    (.gif, .png/.apng, .webp, or the .y4m and .rgb frame streams, which may
+    also go to a named pipe or to standard output as '-'; see
+    output_format). Frames are encoded as they are rendered, so memory does
+    not grow with num_frames. With workers > 1 the frames are rendered in
+    parallel worker processes. backend selects the renderer for lights and
+    stars (see RENDER_BACKENDS). size is the canvas size in pixels; the scene
+    is laid out once and scaled to it. sprite_levels composes lights and the
+    star from a SpriteAtlas, and threads builds the layers of each frame in a
+    thread pool (see generate_frame).
+
+    If a RenderCache is given, a render with identical inputs is copied from
+    the cache instead of being rendered again, and ornament bodies are
+    shared between runs. progress, if given, is called with (frames done,
+    num_frames) after each frame is encoded.
+
+    With spool_dir, every rendered frame is also saved to a FrameSpool in
+    that folder. Running the same render again after an interruption only
+    renders the frames missing from the spool before encoding the output.
+    """
+
+    if num_frames < 1:
+        raise ValueError(f"an animation needs at least 1 frame, got {num_frames}")
+
+    # Find images (an earlier APNG result in the same folder is not an ornament)
+    output_file = output_path if output_path == '-' else os.path.join(folder_path, output_path)
+    extension = output_format(output_file, file_format)
+    if extension in STREAM_FORMATS:
+        cache = None
+    with profile_stage('find_images'):
+        images = find_images(folder_path, limit=sum(SCENE['ornaments_per_row']),
+                             exclude=[output_file])
 
     if not images:
         print("⚠️  No JPG/PNG images found in the folder!")
@@ -579,66 +2948,1295 @@ def generate_christmas_tree_gif(folder_path: str = ".", output_path: str = "chri
         use_default = False
 
     # Canvas settings
-    width, height = 1200, 1600
+    width, height = size
+    frame_duration = SCENE['frame_duration']  # milliseconds
+
+    if cache:
+        cache_key = cache.render_key(images, size=list(size), num_frames=num_frames,
+                                     frame_duration=frame_duration, seed=SCENE_SEED,
+                                     backend=resolve_backend(backend), format=extension,
+                                     sprite_levels=sprite_levels)
+        cached_file = cache.lookup(cache_key, extension)
+        if cached_file:
+            shutil.copyfile(cached_file, output_file)
+            print("♻️  Inputs unchanged, reusing cached render")
+            print(f"\n🎁 Christmas tree saved to: {output_file}")
+            return output_file
+    use_render_cache(cache)
 
     print("🎄 Creating base tree with 6 levels and 21 ornaments...")
 
-    # Create base tree (static elements)
-    random.seed(123)  # For consistent tree appearance
-    base_img, metadata = create_base_tree(width, height)
+    # Create base tree (static elements), seeded for a consistent tree appearance
+    with profile_stage('base_tree'):
+        base_img, metadata = seeded_base_tree(width, height, backend)
 
     print(f"   Ornament positions: {len(metadata['ornament_positions'])}")
     print(f"   Light positions: {len(metadata['light_positions'])}")
 
-    # Generate animation frames
-    num_frames = 20
-    frame_duration = 100  # milliseconds
-
-    print(f"🎬 Generating {num_frames} animation frames...")
-
-    frames = []
-    for frame_num in range(num_frames):
-        print(f"   Frame {frame_num + 1}/{num_frames}", end='\r')
-        frame = generate_frame(base_img, metadata, frame_num, num_frames,
-                              [], images, use_default)
-        frames.append(frame)
-
-    print(f"\n✨ Saving animated GIF...")
+    spool = None
+    if spool_dir:
+        digest = cache.file_digest if cache else file_sha256
+        spool = FrameSpool(spool_dir, size, num_frames, compress=spool_compress,
+                           images=[digest(img) for img in images], seed=SCENE_SEED,
+                           metadata=metadata_digest(metadata), frame_duration=frame_duration,
+                           backend=resolve_backend(backend), sprite_levels=sprite_levels)
+        if spool.done:
+            print(f"💾 Resuming from {spool_dir}: {len(spool.done)} frame(s) already rendered")
+        else:
+            print(f"💾 Spooling frames to {spool_dir}")
 
-    # Save as animated GIF
-    output_file = os.path.join(folder_path, output_path)
-    frames[0].save(
-        output_file,
-        save_all=True,
-        append_images=frames[1:],
-        duration=frame_duration,
-        loop=0,  # Infinite loop
-        optimize=False
-    )
+    # Generate animation frames
+    if workers > 1:
+        print(f"🎬 Generating {num_frames} animation frames with {workers} workers...")
+    else:
+        print(f"🎬 Generating {num_frames} animation frames...")
+
+    # Render and encode frame by frame
+    with open_animation_writer(output_file, (width, height), frame_duration, loop=0,  # Infinite loop
+                               num_frames=num_frames, file_format=file_format) as writer:
+        frames = iter_frames(base_img, metadata, num_frames, images, use_default, workers, spool,
+                             backend=backend, sprite_levels=sprite_levels, threads=threads)
+        for frame_num, frame in enumerate(_timed_iter('frames', frames)):
+            print(f"   Frame {frame_num + 1}/{num_frames}", end='\r')
+            with profile_stage('encode'):
+                writer.add_frame(frame)
+            if progress:
+                progress(frame_num + 1, num_frames)
+        with profile_stage('encode.finish'):
+            writer.close()
+
+    if cache:
+        cache.store(cache_key, extension, output_file)
 
     print(f"\n🎁 Christmas tree saved to: {output_file}")
     print(f"   Image size: {width}x{height} pixels")
-    print(f"   Frames: {num_frames}")
+    if writer.merged_frames:
+        print(f"   Frames: {num_frames} ({writer.merged_frames} repeated frame(s) merged)")
+    else:
+        print(f"   Frames: {num_frames}")
     print(f"   Duration: {frame_duration}ms per frame")
+    if extension == '.rgb':
+        print(f"   Raw rgb24 stream, read it with e.g. ffmpeg -f rawvideo -pix_fmt rgb24 "
+              f"-video_size {width}x{height} -framerate {'%d/%d' % frame_rate(frame_duration)} -i ...")
 
     return output_file
 
 
-def main():
+# Default poster tile: memory use follows the tile size, not the canvas size
+POSTER_TILE_SIZE = (512, 512)
+
+
+class PosterRenderer:
+    """Renders one animation frame tile by tile, for canvases too large to hold in memory.
+
+    A tile draws only the parts of the scene that reach into it, with the
+    drawing code of create_base_tree and generate_frame shifted onto the
+    tile; nothing is allocated at canvas size. The vignette is drawn per
+    tile, and ornament and star sprites are kept only until the rows of
+    tiles have passed them, so tiles should be rendered top to bottom.
+
+    Pillow rasterizes a shape slightly differently when it crosses the
+    image edge, or is shifted sideways, so tiles are drawn to match the
+    frame rendered whole: the base tree is drawn once for the full width
+    of each row of tiles, and each animated layer over the tile plus a
+    margin as wide as its largest shape (a light's glow, a garland
+    segment), then cropped to the tile.
+    """
+
+    def __init__(self, size: tuple, images: list, use_default: bool, frame_num: int = 0,
+                 total_frames: int = SCENE['frame_count'], backend: str = 'auto'):
+        if not 0 <= frame_num < total_frames:
+            raise ValueError(f"frame {frame_num} is not one of the {total_frames} animation frames")
+        self.size = size
+        self.images = images
+        self.use_default = use_default
+        self.frame_num = frame_num
+        self.backend = backend
+        self.metadata = base_tree_metadata(build_scene(random.Random(SCENE_SEED)), *size)
+        self.snowflakes = place_snowflakes(*size)
+        self.text = create_text_layer(*size)
+        self.timeline = AnimationTimeline(self.metadata, total_frames)
+        self.boxes = animated_layer_boxes(self.metadata, {'snowflakes': self.snowflakes}, *size)
+        self.sprites = {}
+
+        metadata = self.metadata
+        _, sy, s = metadata['scale']
+        self._base_row = None  # (top, bottom, image): the base tree of the current row of tiles
+
+        # Margins (x, y) of the animated layers: how far one of their shapes
+        # reaches (snowflakes are pasted, not rasterized, and need none)
+        segment = max((abs(b[0] - a[0]) for row in garland_rows(metadata, 0) for a, b in zip(row, row[1:])),
+                      default=0)
+        garland_width = scaled_size(3, s) + scaled_size(2, s) + 1
+        self.margins = {'stars': (star_dot_size(s),) * 2,
+                        'snow': (0, 0),
+                        'lights': (3 * self.timeline.light_size,) * 2,
+                        'garland': (math.ceil(segment) + garland_width,
+                                    math.ceil(2 * GARLAND_SWING * sy) + garland_width)}
+
+        # Sprite slots in paste order: the ornaments, then the star
+        self.slots = [(idx, x - side//2, y - side//2, side)
+                      for idx, ((x, y), side) in enumerate(zip(metadata['ornament_positions'],
+                                                                metadata['ornament_sizes']))]
+        star_size = scaled_size(SCENE['star_size'], s, 12)
+        self.slots.append(('star', metadata['tree_center'] - star_size//2,
+                           metadata['tree_top'] - star_size//2 + int(round(10 * sy)), star_size))
+
+    def _sprite(self, key, size: int) -> Image.Image:
+        if key not in self.sprites:
+            if key == 'star':
+                self.sprites[key] = render_star(size, *self.timeline.star_state(self.frame_num),
+                                                backend=self.backend)
+            else:
+                glow = self.timeline.ornament_state(self.frame_num, key, self.use_default)
+                self.sprites[key] = create_slot_ornament(key, size, glow, self.images, self.use_default,
+                                                         cache=False)
+        return self.sprites[key]
+
+    def _composite_layer(self, tile: Image.Image, box: tuple, name: str, draw):
+        """Draw the part of an animated layer inside box with draw(layer, origin) and composite it.
+
+        The layer is drawn with the layer's margin around box, then cropped to box.
+        """
+        layer_box = self.boxes[name]
+        if not layer_box:
+            return
+        x0, y0 = max(box[0], layer_box[0]), max(box[1], layer_box[1])
+        x1, y1 = min(box[2], layer_box[2]), min(box[3], layer_box[3])
+        if x0 >= x1 or y0 >= y1:
+            return
+        mx, my = self.margins[name]
+        lx0, ly0 = max(x0 - mx, layer_box[0]), max(y0 - my, layer_box[1])
+        lx1, ly1 = min(x1 + mx, layer_box[2]), min(y1 + my, layer_box[3])
+        layer = Image.new('RGBA', (lx1 - lx0, ly1 - ly0), (0, 0, 0, 0))
+        draw(layer, (lx0, ly0))
+        tile.alpha_composite(layer, dest=(x0 - box[0], y0 - box[1]),
+                             source=(x0 - lx0, y0 - ly0, x1 - lx0, y1 - ly0))
+
+    def render_tile(self, box: tuple) -> Image.Image:
+        """Render the (left, top, right, bottom) box of the frame as an RGB image."""
+        metadata, timeline, frame_num, backend = self.metadata, self.timeline, self.frame_num, self.backend
+        width, height = self.size
+        _, sy, s = metadata['scale']
+        x0, y0, x1, y1 = box
+        if self._base_row is None or self._base_row[:2] != (y0, y1):
+            base = Image.new('RGBA', (width, y1 - y0), (0, 0, 0, 255))
+            draw_base_tree(base, (0, y0), metadata, self.backend)
+            self._base_row = (y0, y1, base)
+        tile = self._base_row[2].crop((x0, 0, x1, y1 - y0))
+
+        def draw_stars(layer, origin):
+            draw_star_dots(layer, origin, metadata['star_positions'][:SCENE['twinkling_stars']],
+                           timeline.star_brightness_at(frame_num), backend, star_dot_size(s))
+
+        def draw_snow(layer, origin):
+            ox, oy = origin
+            for (x, y, snowflake), y_offset in zip(self.snowflakes, timeline.snow_offsets_at(frame_num)):
+                layer.paste(snowflake, (x - ox, y + y_offset - oy), snowflake)
+
+        def draw_lights_layer(layer, origin):
+            draw_lights(layer, origin, metadata['light_positions'], timeline.light_states(frame_num),
+                        backend, timeline.light_size)
+
+        def draw_garland_layer(layer, origin):
+            rows, sparkles = timeline.garland(frame_num)
+            draw_garland_rows(layer, origin, rows, sparkles, s)
+
+        self._composite_layer(tile, box, 'stars', draw_stars)
+        self._composite_layer(tile, box, 'snow', draw_snow)
+
+        # Sprites wholly above this row of tiles are not needed again
+        for key, _, y, size in self.slots:
+            if y + size <= y0:
+                self.sprites.pop(key, None)
+        for key, x, y, size in self.slots:
+            if x < x1 and y < y1 and x + size > x0 and y + size > y0:
+                sprite = self._sprite(key, size)
+                if sprite is not None:
+                    tile.paste(sprite, (x - x0, y - y0), sprite)
+
+        self._composite_layer(tile, box, 'lights', draw_lights_layer)
+        self._composite_layer(tile, box, 'garland', draw_garland_layer)
+
+        if self.text:
+            text_scaled, (text_x, text_y) = self.text
+            if text_x < x1 and text_y < y1 and text_x + text_scaled.width > x0 and text_y + text_scaled.height > y0:
+                tile.paste(text_scaled, (text_x - x0, text_y - y0), text_scaled)
+
+        vignette = Image.new('RGBA', tile.size, (0, 0, 0, 0))
+        draw_vignette(OffsetDraw(vignette, (x0, y0)), width, height)
+        tile.alpha_composite(vignette)
+        return tile.convert('RGB')
+
+
+def render_poster(folder_path: str = ".", output_path: str = "christmas_tree_poster.png",
+                  size: tuple = REFERENCE_SIZE, frame_num: int = 0,
+                  num_frames: int = SCENE['frame_count'], backend: str = 'auto',
+                  tile_size: tuple = POSTER_TILE_SIZE) -> str:
+    """Render one frame of the animation as a PNG poster, tile by tile.
+
+    Peak memory depends on tile_size and the canvas width (one strip of
+    tiles is encoded at a time), not on the canvas area, so 8K and 16K
+    posters fit in a few hundred megabytes. frame_num selects the frame of a
+    num_frames animation.
+    """
+    output_file = os.path.join(folder_path, output_path)
+    with profile_stage('find_images'):
+        images = find_images(folder_path, limit=sum(SCENE['ornaments_per_row']), exclude=[output_file])
+    if images:
+        print(f"🖼️  Found {len(images)} image(s)")
+    else:
+        print("⚠️  No JPG/PNG images found in the folder, using default colored ornaments")
+
+    width, height = size
+    tile_width, tile_height = tile_size
+    renderer = PosterRenderer(size, images, not images, frame_num, num_frames, backend)
+    strips = -(-height // tile_height)
+    print(f"🖨️  Rendering a {width}x{height} poster in {tile_width}x{tile_height} tiles...")
+
+    with PngStripWriter(output_file, size) as writer:
+        for index, top in enumerate(range(0, height, tile_height)):
+            strip = Image.new('RGB', (width, min(tile_height, height - top)))
+            for left in range(0, width, tile_width):
+                with profile_stage('poster.tile'):
+                    strip.paste(renderer.render_tile((left, top, min(left + tile_width, width),
+                                                      top + strip.height)), (left, 0))
+            with profile_stage('poster.encode'):
+                writer.write(strip)
+            print(f"   Strip {index + 1}/{strips}", end='\r')
+
+    print(f"\n🎁 Poster saved to: {output_file}")
+    return output_file
+
+
+class FolderWatcher:
+    """Polls a folder for added, replaced or removed image files.
+
+    A change is only reported once the folder has looked the same for two
+    polls in a row, so files still being copied are not picked up halfway.
+    """
+
+    def __init__(self, folder_path: str):
+        self.folder_path = folder_path
+        self.snapshot = self._scan()
+        self._pending = None
+
+    def _scan(self) -> dict:
+        stamps = {}
+        with os.scandir(self.folder_path) as entries:
+            for entry in entries:
+                if os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    stamps[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return stamps
+
+    def poll(self) -> list:
+        """Return the image files changed since the last reported change (may be empty)."""
+        current = self._scan()
+        if current == self.snapshot:
+            self._pending = None
+            return []
+        if current != self._pending:
+            self._pending = current
+            return []
+        changed = sorted(path for path in set(current) | set(self.snapshot)
+                         if current.get(path) != self.snapshot.get(path))
+        self.snapshot, self._pending = current, None
+        return changed
+
+
+class WatchSession:
+    """Keeps a folder's tree in memory and re-renders it incrementally.
+
+    The base tree, static layers and decoded ornament bodies stay cached
+    (bodies in the SourceImageCache, keyed on file identity and bounded by
+    its memory budget), so each render only decodes the images of slots
+    whose image (images[idx % len(images)]) changed; the frames are then
+    recomposed from the cached bodies and glow overlays and re-encoded.
+    workers, threads, sprite_levels and file_format are as for
+    generate_christmas_tree_gif; worker processes are started per render,
+    so with workers > 1 bodies are only shared through a RenderCache.
+    """
+
+    def __init__(self, folder_path: str, output_path: str = "christmas_tree.gif",
+                 num_frames: int = SCENE['frame_count'], backend: str = 'auto',
+                 size: tuple = REFERENCE_SIZE, workers: int = 1, threads: int = 1,
+                 sprite_levels: int = None, file_format: str = None):
+        self.folder_path = folder_path
+        self.output_file = os.path.join(folder_path, output_path)
+        self.num_frames = num_frames
+        self.backend = backend
+        self.size = size
+        self.workers = workers
+        self.threads = threads
+        self.sprite_levels = sprite_levels
+        self.file_format = file_format
+        self.base_img, self.metadata = seeded_base_tree(*size, backend)
+        self.assignments = None
+
+    def _slot_assignments(self, images: list) -> list:
+        assignments = []
+        for idx in range(len(self.metadata['ornament_positions'])):
+            if not images:
+                assignments.append(None)
+                continue
+            try:
+                assignments.append(_file_key(images[idx % len(images)]))
+            except OSError:
+                assignments.append(images[idx % len(images)])
+        return assignments
+
+    def render(self) -> int:
+        """Render every frame to the output file. Returns the number of new or replaced images.
+
+        Only those images are decoded again; the others come from the cache.
+        """
+        images = find_images(self.folder_path, limit=len(self.metadata['ornament_positions']),
+                             exclude=[self.output_file])
+        assignments = self._slot_assignments(images)
+        changed = set(assignments) - set(self.assignments or ()) - {None}
+        self.assignments = assignments
+
+        with open_animation_writer(self.output_file, self.size, SCENE['frame_duration'],
+                                   loop=0, num_frames=self.num_frames, file_format=self.file_format) as writer:
+            for frame in iter_frames(self.base_img, self.metadata, self.num_frames, images, not images,
+                                     self.workers, backend=self.backend, sprite_levels=self.sprite_levels,
+                                     threads=self.threads):
+                writer.add_frame(frame)
+        return len(changed)
+
+
+def watch_folder(folder_path: str, output_path: str = "christmas_tree.gif", interval: float = 2.0,
+                 cache: RenderCache = None, **options):
+    """Render the tree, then re-render it whenever the folder's images change.
+
+    Runs until interrupted. options are passed on to WatchSession.
+    """
+    use_render_cache(cache)
+    session = WatchSession(folder_path, output_path, **options)
+    watcher = FolderWatcher(folder_path)
+
+    def render():
+        changed_images = session.render()
+        if cache:
+            cache.save_digests()
+            cache.prune()
+        return changed_images
+
+    start = time.perf_counter()
+    render()
+    print(f"🎁 Christmas tree saved to: {session.output_file} ({time.perf_counter() - start:.1f}s)")
+    print(f"👀 Watching {folder_path} for new images (Ctrl+C to stop)...")
+
+    try:
+        while True:
+            time.sleep(interval)
+            changed = [path for path in watcher.poll()
+                       if os.path.abspath(path) != os.path.abspath(session.output_file)]
+            if not changed:
+                continue
+            print(f"🔄 Changed: {', '.join(os.path.basename(path) for path in changed)}")
+            start = time.perf_counter()
+            changed_images = render()
+            print(f"🎁 Updated {session.output_file}: {changed_images} image(s) changed, "
+                  f"{session.num_frames} frames re-encoded in {time.perf_counter() - start:.1f}s")
+    except KeyboardInterrupt:
+        print("\n👋 Stopped watching")
+    return session.output_file
+
+
+def read_batch_folders(specs: list) -> list:
+    """Expand batch specs into a list of folders.
+
+    Each spec is either a manifest file, listing one folder per line (blank
+    lines and lines starting with # are ignored; relative folders are
+    relative to the manifest), or a glob pattern matching folders.
+    """
+    folders = []
+    for spec in specs:
+        if os.path.isfile(spec):
+            base = os.path.dirname(os.path.abspath(spec))
+            with open(spec, encoding='utf-8') as fp:
+                for line in fp:
+                    line = line.strip()
+                    if line and not line.startswith('#'):
+                        folders.append(os.path.join(base, os.path.expanduser(line)))
+        else:
+            matches = sorted(path for path in glob.glob(os.path.expanduser(spec)) if os.path.isdir(path))
+            if not matches:
+                print(f"⚠️  No folders match '{spec}'")
+            folders.extend(matches)
+
+    unique = []
+    for folder in map(os.path.abspath, folders):
+        if folder not in unique:
+            unique.append(folder)
+    return unique
+
+
+def _init_batch_worker(cache_dir: str):
+    """Keep one render cache per batch worker process, shared by all its trees."""
+    _worker_state['cache'] = RenderCache(cache_dir) if cache_dir else None
+
+
+def _render_tree_in_worker(folder_path: str, output_path: str, options: dict) -> tuple:
+    """Render one batch tree. Returns (folder, output file, seconds, error message)."""
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            output_file = generate_christmas_tree_gif(folder_path, output_path,
+                                                      cache=_worker_state.get('cache'), **options)
+        error = None
+    except Exception as exc:
+        output_file, error = None, f"{type(exc).__name__}: {exc}"
+    return folder_path, output_file, time.perf_counter() - start, error
+
+
+def generate_batch(folders: list, output_path: str = "christmas_tree.gif", workers: int = 1,
+                   cache: RenderCache = None, **options) -> list:
+    """Render a tree for each folder, scheduling the trees across worker processes.
+
+    Each process keeps its base trees, static layers and decoded ornaments
+    for all the trees it renders; with a RenderCache, decoded ornaments are
+    also shared between processes and runs. options are passed on to
+    generate_christmas_tree_gif. Prints a line per tree and a throughput
+    summary, and returns the (folder, output file, seconds, error) results.
+    """
+    num_frames = options.get('num_frames', SCENE['frame_count'])
+    print(f"🎄 Rendering {len(folders)} tree(s) with {workers} worker(s)...")
+
+    start = time.perf_counter()
+    cache_dir = cache.root if cache else None
+    if workers > 1 and len(folders) > 1:
+        pool = futures.ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                                           initargs=(cache_dir,))
+        results = pool.map(_render_tree_in_worker, folders,
+                           [output_path] * len(folders), [options] * len(folders))
+    else:
+        pool = None
+        _init_batch_worker(cache_dir)
+        results = (_render_tree_in_worker(folder, output_path, options) for folder in folders)
+
+    finished = []
+    try:
+        for folder, output_file, seconds, error in results:
+            finished.append((folder, output_file, seconds, error))
+            status = f"❌ {error}" if error else f"✅ {output_file}"
+            print(f"   [{len(finished)}/{len(folders)}] {seconds:6.2f}s  {folder}  {status}")
+    finally:
+        if pool:
+            pool.shutdown()
+    elapsed = time.perf_counter() - start
+
+    rendered = sum(1 for result in finished if result[3] is None)
+    print(f"\n🎁 {rendered}/{len(folders)} tree(s) rendered in {elapsed:.1f}s")
+    if elapsed > 0 and rendered:
+        print(f"   Throughput: {rendered / elapsed:.2f} trees/s, "
+              f"{rendered * num_frames / elapsed:.1f} frames/s")
+    return finished
+
+
+# Render service: jobs that may wait in the queue before new ones are refused,
+# and finished jobs remembered for status and download requests
+SERVICE_QUEUE_SIZE = 16
+SERVICE_JOB_HISTORY = 256
+SERVICE_FORMATS = ('gif', 'png', 'apng', 'webp')
+SERVICE_CHUNK_SIZE = 64 * 1024
+
+
+def parse_job_request(data: dict) -> tuple:
+    """Validate a render request from the service API. Returns (folder, options, extension).
+
+    data holds 'folder' and optionally 'frames', 'size' ("WxH" or [w, h]),
+    'backend', 'format' (see SERVICE_FORMATS) and 'sprite_levels'. Raises
+    ValueError for an invalid request.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("request body must be a JSON object")
+    folder = data.get('folder')
+    if not isinstance(folder, str) or not os.path.isdir(folder):
+        raise ValueError(f"not a folder: {folder!r}")
+
+    def is_int(value):
+        # JSON true and false arrive as bools, which Python counts as ints
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    size = data.get('size', REFERENCE_SIZE)
+    try:
+        size = parse_size(size) if isinstance(size, str) else tuple(size)
+    except (argparse.ArgumentTypeError, TypeError) as exc:
+        raise ValueError(str(exc)) from None
+    if len(size) != 2 or not all(is_int(n) and n >= MIN_CANVAS_SIZE for n in size):
+        raise ValueError(f"invalid size: {data.get('size')!r}")
+    num_frames = data.get('frames', SCENE['frame_count'])
+    if not is_int(num_frames) or num_frames < 1:
+        raise ValueError(f"invalid frame count: {num_frames!r}")
+    backend = data.get('backend', 'auto')
+    try:
+        resolve_backend(backend)
+    except RuntimeError as exc:
+        raise ValueError(str(exc)) from None
+    sprite_levels = data.get('sprite_levels')
+    if sprite_levels is not None and (not is_int(sprite_levels) or sprite_levels < 2):
+        raise ValueError(f"invalid sprite levels: {sprite_levels!r}")
+    file_format = data.get('format', 'gif')
+    if file_format not in SERVICE_FORMATS:
+        raise ValueError(f"unknown format '{file_format}' (use one of {', '.join(SERVICE_FORMATS)})")
+
+    options = {'num_frames': num_frames, 'backend': backend, 'size': size,
+               'sprite_levels': sprite_levels}
+    return os.path.abspath(folder), options, '.' + file_format
+
+
+def render_job_key(folder: str, options: dict, extension: str) -> str:
+    """Key identifying a render request: the folder's current images and the options.
+
+    Images are identified by path, modification time and size, so the key is
+    cheap to compute and changes when an image is added or replaced.
+    """
+    images = find_images(folder, limit=sum(SCENE['ornaments_per_row']))
+    text = json.dumps({'folder': folder, 'images': [list(_file_key(path)) for path in images],
+                       'options': options, 'format': extension}, sort_keys=True)
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def _init_service_worker(cache_dir: str, progress_queue):
+    """Keep the render cache and the progress queue of a service worker process."""
+    _init_batch_worker(cache_dir)
+    _worker_state['progress'] = progress_queue
+
+
+def _render_job_in_worker(job_id: str, folder_path: str, output_file: str, options: dict) -> str:
+    """Render one service job, reporting each encoded frame on the progress queue."""
+    progress_queue = _worker_state['progress']
+    with contextlib.redirect_stdout(io.StringIO()):
+        return generate_christmas_tree_gif(
+            folder_path, output_file, cache=_worker_state.get('cache'),
+            progress=lambda done, total: progress_queue.put((job_id, done, total)), **options)
+
+
+class RenderJob:
+    """A render requested from the service, shared by all identical requests."""
+
+    def __init__(self, job_id: str, key: str, folder: str, options: dict, output_file: str):
+        self.id = job_id
+        self.key = key
+        self.folder = folder
+        self.options = options
+        self.output_file = output_file
+        self.state = 'queued'  # queued, running, done or failed
+        self.frames_done = 0
+        self.error = None
+        self.requests = 1
+        self.seconds = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.state in ('done', 'failed')
+
+    def update(self, **fields):
+        """Change the job's fields and wake everyone waiting for progress."""
+        for name, value in fields.items():
+            setattr(self, name, value)
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def updates(self):
+        """Yield the job's status now and after every change, until it finishes."""
+        while True:
+            changed = self._changed
+            yield self.status()
+            if self.finished:
+                return
+            await changed.wait()
+
+    def status(self) -> dict:
+        return {'id': self.id, 'state': self.state, 'frames_done': self.frames_done,
+                'frames': self.options['num_frames'], 'requests': self.requests,
+                'seconds': self.seconds, 'error': self.error}
+
+
+class RenderService:
+    """Queues render jobs and runs them in a pool of worker processes.
+
+    Requests for the same folder contents and options share one job. Worker
+    processes live as long as the service, so their base trees, static
+    layers and decoded ornaments stay warm between jobs. Frame progress is
+    sent back from the workers over a multiprocessing queue.
+    """
+
+    def __init__(self, output_dir: str, workers: int = 1, queue_size: int = SERVICE_QUEUE_SIZE,
+                 cache: RenderCache = None):
+        self.output_dir = output_dir
+        self.workers = max(1, workers)
+        self.queue_size = queue_size
+        self.cache = cache
+        self.jobs = OrderedDict()
+        self._by_key = {}
+        self._next_id = 1
+
+    async def start(self):
+        """Start the worker processes and the tasks feeding them."""
+        os.makedirs(self.output_dir, exist_ok=True)
+        self.queue = asyncio.Queue(self.queue_size)
+        self.progress = multiprocessing.SimpleQueue()
+        self.pool = futures.ProcessPoolExecutor(
+            max_workers=self.workers, initializer=_init_service_worker,
+            initargs=(self.cache.root if self.cache else None, self.progress))
+        self._tasks = [asyncio.create_task(self._run_jobs()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._read_progress()))
+
+    async def close(self):
+        """Stop taking jobs and shut down the worker processes."""
+        for task in self._tasks[:-1]:
+            task.cancel()
+        self.progress.put(None)
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self.pool.shutdown(cancel_futures=True)
+
+    async def submit(self, folder: str, options: dict, extension: str) -> tuple:
+        """Queue a render, or join an identical one. Returns (job, whether it is new).
+
+        Raises asyncio.QueueFull when the queue is full.
+        """
+        loop = asyncio.get_running_loop()
+        key = await loop.run_in_executor(None, render_job_key, folder, options, extension)
+        job = self._by_key.get(key)
+        if job and job.state != 'failed' and (not job.finished or os.path.exists(job.output_file)):
+            job.update(requests=job.requests + 1)
+            return job, False
+
+        job_id = f"job-{self._next_id}"
+        job = RenderJob(job_id, key, folder, options,
+                        os.path.join(self.output_dir, key[:16] + extension))
+        self.queue.put_nowait(job)
+        self._next_id += 1
+        self.jobs[job_id] = job
+        self._by_key[key] = job
+        self._forget_old_jobs()
+        return job, True
+
+    def _forget_old_jobs(self):
+        finished = [job for job in self.jobs.values() if job.finished]
+        for job in finished[:max(0, len(self.jobs) - SERVICE_JOB_HISTORY)]:
+            del self.jobs[job.id]
+            if self._by_key.get(job.key) is job:
+                del self._by_key[job.key]
+
+    async def _run_jobs(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            job.update(state='running')
+            start = time.perf_counter()
+            try:
+                await loop.run_in_executor(self.pool, _render_job_in_worker, job.id, job.folder,
+                                           job.output_file, job.options)
+            except Exception as exc:
+                job.update(state='failed', error=f"{type(exc).__name__}: {exc}",
+                           seconds=round(time.perf_counter() - start, 3))
+            else:
+                job.update(state='done', frames_done=job.options['num_frames'],
+                           seconds=round(time.perf_counter() - start, 3))
+            print(f"   {job.id} {job.state} in {job.seconds:.2f}s  {job.folder}")
+
+    async def _read_progress(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            message = await loop.run_in_executor(None, self.progress.get)
+            if message is None:
+                return
+            job_id, done, _ = message
+            job = self.jobs.get(job_id)
+            if job and not job.finished:
+                job.update(frames_done=done)
+
+    async def handle_http(self, reader, writer):
+        """Serve one HTTP request (the connection is closed after the response).
+
+        POST /jobs                queue a render (JSON body, see parse_job_request)
+        GET  /jobs/<id>           job status
+        GET  /jobs/<id>/events    status lines (JSON) streamed as frames complete
+        GET  /jobs/<id>/result    the encoded animation, once the job is done
+        """
+        try:
+            request_line = (await reader.readline()).decode('latin-1')
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            method, target = request_line.split()[:2]
+            body = await reader.readexactly(int(headers.get('content-length', 0)))
+            await self._route(method, target.partition('?')[0].rstrip('/').split('/')[1:], body, writer)
+        except (ValueError, asyncio.IncompleteReadError):
+            await _send_json(writer, 400, {'error': 'malformed request'})
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _route(self, method: str, parts: list, body: bytes, writer):
+        if parts == ['jobs'] and method == 'POST':
+            try:
+                folder, options, extension = parse_job_request(json.loads(body or b'{}'))
+            except ValueError as exc:
+                return await _send_json(writer, 400, {'error': str(exc)})
+            try:
+                job, created = await self.submit(folder, options, extension)
+            except asyncio.QueueFull:
+                return await _send_json(writer, 503, {'error': 'render queue is full, retry later'},
+                                        {'Retry-After': '5'})
+            return await _send_json(writer, 202 if created else 200, job.status())
+
+        job = self.jobs.get(parts[1]) if len(parts) in (2, 3) and parts[0] == 'jobs' else None
+        if job is None or method != 'GET':
+            return await _send_json(writer, 404, {'error': 'not found'})
+        if len(parts) == 2:
+            return await _send_json(writer, 200, job.status())
+        if parts[2] == 'events':
+            await _send_head(writer, 200, 'application/x-ndjson')
+            async for status in job.updates():
+                writer.write(json.dumps(status).encode('utf-8') + b'\n')
+                await writer.drain()
+            return
+        if parts[2] != 'result':
+            return await _send_json(writer, 404, {'error': 'not found'})
+        if job.state != 'done':
+            return await _send_json(writer, 409, job.status())
+
+        content_type = {'.gif': 'image/gif', '.webp': 'image/webp'}.get(
+            os.path.splitext(job.output_file)[1], 'image/apng')
+        with open(job.output_file, 'rb') as fp:
+            await _send_head(writer, 200, content_type, {'Content-Length': str(os.fstat(fp.fileno()).st_size)})
+            while chunk := fp.read(SERVICE_CHUNK_SIZE):
+                writer.write(chunk)
+                await writer.drain()
+
+
+HTTP_REASONS = {200: 'OK', 202: 'Accepted', 400: 'Bad Request', 404: 'Not Found',
+                409: 'Conflict', 503: 'Service Unavailable'}
+
+
+async def _send_head(writer, status: int, content_type: str, headers: dict = None):
+    lines = [f"HTTP/1.1 {status} {HTTP_REASONS[status]}", f"Content-Type: {content_type}",
+             "Connection: close"]
+    lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+    writer.write(("\r\n".join(lines) + "\r\n\r\n").encode('latin-1'))
+    await writer.drain()
+
+
+async def _send_json(writer, status: int, data: dict, headers: dict = None):
+    body = json.dumps(data).encode('utf-8')
+    await _send_head(writer, status, 'application/json',
+                     dict(headers or {}, **{'Content-Length': str(len(body))}))
+    writer.write(body)
+    await writer.drain()
+
+
+async def serve(host: str = '127.0.0.1', port: int = 8765, output_dir: str = None,
+                workers: int = 1, queue_size: int = SERVICE_QUEUE_SIZE, cache: RenderCache = None):
+    """Run the render service's HTTP API until cancelled."""
+    service = RenderService(output_dir or os.path.join(default_cache_dir(), 'service'),
+                            workers=workers, queue_size=queue_size, cache=cache)
+    await service.start()
+    try:
+        server = await asyncio.start_server(service.handle_http, host, port)
+        async with server:
+            print(f"🛰️  Render service on http://{host}:{server.sockets[0].getsockname()[1]} "
+                  f"({service.workers} worker(s), queue of {queue_size})")
+            await server.serve_forever()
+    finally:
+        await service.close()
+
+
+class ServiceClient:
+    """Blocking client for the render service, standing in for the web front end."""
+
+    def __init__(self, url: str = 'http://127.0.0.1:8765', timeout: float = 60):
+        self.url = url.rstrip('/')
+        self.timeout = timeout
+
+    def _open(self, method: str, path: str, data: dict = None):
+        body = None if data is None else json.dumps(data).encode('utf-8')
+        request = urllib_request.Request(self.url + path, data=body, method=method,
+                                         headers={'Content-Type': 'application/json'})
+        try:
+            return urllib_request.urlopen(request, timeout=self.timeout)
+        except urllib_request.HTTPError as exc:
+            try:
+                message = json.loads(exc.read()).get('error') or exc.reason
+            except ValueError:
+                message = exc.reason
+            raise RuntimeError(f"Render service error {exc.code}: {message}") from None
+
+    def submit(self, folder: str, **request) -> dict:
+        """Queue a render of folder (see parse_job_request for the options). Returns its status."""
+        with self._open('POST', '/jobs', dict(request, folder=os.path.abspath(folder))) as response:
+            return json.load(response)
+
+    def status(self, job_id: str) -> dict:
+        with self._open('GET', f'/jobs/{job_id}') as response:
+            return json.load(response)
+
+    def progress(self, job_id: str):
+        """Yield the job's status as frames complete, until it is done or failed."""
+        with self._open('GET', f'/jobs/{job_id}/events') as response:
+            for line in response:
+                yield json.loads(line)
+
+    def download(self, job_id: str, path: str) -> str:
+        """Save the job's animation to path."""
+        with self._open('GET', f'/jobs/{job_id}/result') as response, open(path, 'wb') as fp:
+            shutil.copyfileobj(response, fp, SERVICE_CHUNK_SIZE)
+        return path
+
+    def render(self, folder: str, path: str, **request) -> str:
+        """Submit a render, print its progress, and save the animation to path."""
+        job = self.submit(folder, **request)
+        for status in self.progress(job['id']):
+            print(f"   {status['id']}: {status['state']} {status['frames_done']}/{status['frames']}",
+                  end='\r')
+        print()
+        if status['state'] == 'failed':
+            raise RuntimeError(f"Render failed: {status['error']}")
+        return self.download(job['id'], path)
+
+
+# Default benchmark matrix: canvas sizes, frame counts and ornament image counts
+# (0 renders the default colored ornaments)
+BENCHMARK_SIZES = ((300, 400), (600, 800), REFERENCE_SIZE)
+BENCHMARK_FRAME_COUNTS = (5, 20)
+BENCHMARK_ORNAMENT_COUNTS = (0, 6, 21)
+
+
+def create_synthetic_image(path: str, size: int, rng: random.Random):
+    """Write a nebula-like test image: soft colored clouds over a star field."""
+    clouds = Image.frombytes('RGB', (8, 8), bytes(rng.randrange(256) for _ in range(8 * 8 * 3)))
+    img = clouds.resize((size, size), Image.BICUBIC).filter(ImageFilter.GaussianBlur(size / 32))
+    falloff = Image.radial_gradient('L').resize((size, size)).point(lambda v: 255 - v)
+    img = Image.composite(img, Image.new('RGB', (size, size)), falloff)
+    draw = ImageDraw.Draw(img)
+    for _ in range(size // 2):
+        x, y, brightness = rng.randrange(size), rng.randrange(size), rng.randrange(120, 256)
+        draw.point((x, y), fill=(brightness, brightness, brightness))
+    img.save(path, quality=90)
+
+
+def run_benchmark(sizes=BENCHMARK_SIZES, frame_counts=BENCHMARK_FRAME_COUNTS,
+                  ornament_counts=BENCHMARK_ORNAMENT_COUNTS, backend: str = 'auto',
+                  image_size: int = 1024) -> list:
+    """Time full renders on synthetic images for every size/frame/ornament combination.
+
+    Each run starts with cold in-memory caches and no render cache. Prints a
+    line per run with its per-stage breakdown and returns the runs as dicts
+    with wall time, ms per frame, peak RSS (of the process so far; runs go
+    from small to large canvases) and the StageProfiler report.
+    """
+    runs = []
+    with tempfile.TemporaryDirectory(prefix='xmastree-bench-') as tmp:
+        rng = random.Random(2025)
+        sources = []
+        for i in range(max(ornament_counts, default=0)):
+            sources.append(os.path.join(tmp, f"synthetic_{i:02d}.jpg"))
+            create_synthetic_image(sources[-1], image_size, rng)
+
+        output_file = os.path.join(tmp, 'benchmark.gif')
+        for size in sorted(sizes, key=lambda wh: wh[0] * wh[1]):
+            for num_frames in frame_counts:
+                for count in ornament_counts:
+                    folder = os.path.join(tmp, f"ornaments_{count}")
+                    if not os.path.isdir(folder):
+                        os.mkdir(folder)
+                        for source in sources[:count]:
+                            shutil.copyfile(source, os.path.join(folder, os.path.basename(source)))
+
+                    _ornament_cache.clear()
+                    create_ornament_overlay.cache_clear()
+                    create_static_layers.cache_clear()
+                    seeded_base_tree.cache_clear()
+
+                    profiler = StageProfiler()
+                    start = time.perf_counter()
+                    with profiling(profiler), contextlib.redirect_stdout(io.StringIO()):
+                        generate_christmas_tree_gif(folder, output_file, num_frames=num_frames,
+                                                    backend=backend, size=size)
+                    wall = time.perf_counter() - start
+
+                    run = {
+                        'size': f"{size[0]}x{size[1]}",
+                        'frames': num_frames,
+                        'ornament_images': count,
+                        'backend': resolve_backend(backend),
+                        'wall_seconds': round(wall, 4),
+                        'ms_per_frame': round(1000 * wall / num_frames, 2),
+                        'output_bytes': os.path.getsize(output_file),
+                        'peak_rss_mb': peak_rss_mb(),
+                        'stages': profiler.report(),
+                    }
+                    runs.append(run)
+
+                    print(f"   {run['size']:>9} {num_frames:4d} frames {count:3d} images  "
+                          f"{wall:7.2f}s {run['ms_per_frame']:8.1f} ms/frame  "
+                          f"peak RSS {run['peak_rss_mb']} MB")
+                    ranked = sorted(run['stages'].items(), key=lambda item: -item[1]['seconds'])
+                    print("      " + ", ".join(f"{name} {1000 * stats['seconds']:.0f}ms"
+                                              for name, stats in ranked if name != 'frames'))
+    return runs
+
+
+def measure_startup(repeats: int = 5) -> dict:
+    """Time fresh interpreter start-up for importing the module and for --help.
+
+    Each command runs in a new process; the best of `repeats` wall times is
+    kept, in milliseconds, so the numbers track what a user waits for.
+    """
+    script = os.path.abspath(__file__)
+    # Import this file by path, whatever it is named and wherever it is run from
+    module_name = os.path.splitext(os.path.basename(script))[0]
+    if __spec__ is not None and __spec__.name != '__main__':
+        module_name = __spec__.name
+    import_code = ("import importlib.util, sys; "
+                   "spec = importlib.util.spec_from_file_location(sys.argv[1], sys.argv[2]); "
+                   "spec.loader.exec_module(importlib.util.module_from_spec(spec))")
+    commands = {
+        'import_ms': [sys.executable, '-c', import_code, module_name, script],
+        'help_ms': [sys.executable, script, '--help'],
+    }
+    startup = {}
+    for name, command in commands.items():
+        best = float('inf')
+        for _ in range(repeats):
+            start = time.perf_counter()
+            subprocess.run(command, cwd=os.path.dirname(script), check=True,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            best = min(best, time.perf_counter() - start)
+        startup[name] = round(1000 * best, 1)
+    return startup
+
+
+def parse_size(text: str) -> tuple:
+    """Parse a WIDTHxHEIGHT canvas size argument."""
+    try:
+        width, height = (int(v) for v in text.lower().split('x'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid size '{text}', expected WIDTHxHEIGHT") from None
+    if width < MIN_CANVAS_SIZE or height < MIN_CANVAS_SIZE:
+        raise argparse.ArgumentTypeError(f"size '{text}' is too small (minimum {MIN_CANVAS_SIZE} pixels a side)")
+    return width, height
+
+
+def scaled_canvas_size(scale: float) -> tuple:
+    """Return the canvas size at scale times REFERENCE_SIZE."""
+    return tuple(round(side * scale) for side in REFERENCE_SIZE)
+
+
+def parse_scale(text: str) -> float:
+    """Parse a --scale argument, which must give a canvas of at least MIN_CANVAS_SIZE a side."""
+    try:
+        scale = float(text)
+    except ValueError:
+        scale = math.nan
+    if not math.isfinite(scale):
+        raise argparse.ArgumentTypeError(f"invalid scale '{text}'")
+    if min(scaled_canvas_size(scale)) < MIN_CANVAS_SIZE:
+        raise argparse.ArgumentTypeError(f"scale {text} is too small (the canvas needs at least "
+                                         f"{MIN_CANVAS_SIZE} pixels a side)")
+    return scale
+
+
+def int_at_least(minimum: int):
+    """Return an argparse type for integers of at least minimum."""
+    def parse(text: str) -> int:
+        try:
+            value = int(text)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"invalid integer '{text}'") from None
+        if value < minimum:
+            raise argparse.ArgumentTypeError(f"must be at least {minimum}, got {value}")
+        return value
+    return parse
+
+
+def positive_float(text: str) -> float:
+    """argparse type for a finite number greater than 0."""
+    try:
+        value = float(text)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number '{text}'") from None
+    if not (math.isfinite(value) and value > 0):
+        raise argparse.ArgumentTypeError(f"must be greater than 0, got {text}")
+    return value
+
+
+# Subcommands; a command line that starts with anything else is a render
+COMMANDS = ('render', 'batch', 'poster', 'benchmark', 'serve', 'submit')
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """Build the command-line parser with its subcommands (see COMMANDS)."""
+    canvas = argparse.ArgumentParser(add_help=False)
+    canvas.add_argument("--frames", type=int_at_least(1), metavar="N",
+                        help="number of animation frames (default: %d; benchmark: %s)"
+                             % (SCENE['frame_count'], ", ".join(map(str, BENCHMARK_FRAME_COUNTS))))
+    canvas.add_argument("--backend", choices=RENDER_BACKENDS, default="auto",
+                        help="renderer for lights and stars; 'auto' is PIL, the faster one at scene sizes")
+    canvas.add_argument("--profile", metavar="FILE",
+                        help="write per-stage timings, wall time and peak memory as JSON "
+                             "to FILE ('-' for standard output)")
+    size_group = canvas.add_mutually_exclusive_group()
+    size_group.add_argument("--scale", type=parse_scale, metavar="S",
+                            help="render at S times the %dx%d reference size" % REFERENCE_SIZE)
+    size_group.add_argument("--size", type=parse_size, metavar="WxH",
+                            help="render at an explicit canvas size, e.g. 300x400")
+
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--workers", type=int, default=1, metavar="N",
+                        help="render frames (trees in a batch) in N worker processes "
+                             "(0 = one per CPU core)")
+    output.add_argument("--output", default="christmas_tree.gif", metavar="FILE",
+                        help="output file, relative to the folder; the extension selects "
+                             "GIF, APNG (.png/.apng), animated WebP, or a Y4M (.y4m) or raw RGB "
+                             "(.rgb) frame stream, which may be a named pipe or '-' for standard "
+                             "output (default: christmas_tree.gif)")
+    output.add_argument("--format", choices=[extension[1:] for extension in ANIMATION_WRITERS],
+                        help="output format, instead of the one the --output extension selects "
+                             "(with --output -: y4m)")
+    output.add_argument("--sprite-levels", type=int_at_least(2), metavar="N",
+                        help="blit lights and the star from a pre-rendered sprite atlas with N "
+                             "brightness levels and twinkle phases (faster, slightly stepped animation)")
+    output.add_argument("--threads", type=int, default=1, metavar="N",
+                        help="build the layers of each frame concurrently in N threads; the "
+                             "frames are identical (default: 1)")
+    output.add_argument("--cache-dir", metavar="DIR",
+                        help="render cache folder, pruned to the %d MiB most recently used "
+                             "(default: $XMASTREE_CACHE_DIR or ~/.cache/stargazers-xmastree)"
+                             % (CACHE_MAX_BYTES >> 20))
+    output.add_argument("--no-cache", action="store_true",
+                        help="always render, without reading or writing the render cache")
+
+    parser = argparse.ArgumentParser(description="Generate an animated Christmas tree GIF "
+                                                 "decorated with your astronomical images.",
+                                     epilog="Without a command, the arguments are those of 'render'.")
+    commands = parser.add_subparsers(dest="command", metavar="COMMAND")
+
+    render = commands.add_parser("render", parents=[canvas, output],
+                                 help="render the tree for one folder (default)")
+    render.add_argument("folder", nargs="?", default=".",
+                        help="folder containing the JPG/PNG images (default: current folder)")
+    render.add_argument("--watch", action="store_true",
+                        help="keep running and update the tree whenever images are added "
+                             "or replaced in the folder")
+    render.add_argument("--interval", type=positive_float, default=2.0, metavar="SECONDS",
+                        help="how often --watch checks the folder (default: 2)")
+    render.add_argument("--spool", metavar="DIR",
+                        help="also save every rendered frame in DIR; after an interruption, the "
+                             "same command renders only the frames missing there")
+    render.add_argument("--spool-compress", action="store_true",
+                        help="save spooled frames as PNG instead of raw pixels (smaller, slower)")
+    render.add_argument("--export-timeline", metavar="FILE",
+                        help="write the animated parameters of every frame as JSON to FILE "
+                             "instead of rendering")
+
+    batch = commands.add_parser("batch", parents=[canvas, output],
+                                help="render a tree for every folder in manifests or glob patterns")
+    batch.add_argument("specs", nargs="+", metavar="SPEC",
+                       help="manifest file listing folders, or a glob pattern matching folders")
+
+    poster = commands.add_parser("poster", parents=[canvas],
+                                 help="render one frame as a large PNG poster, tile by tile")
+    poster.add_argument("folder", nargs="?", default=".",
+                        help="folder containing the JPG/PNG images (default: current folder)")
+    poster.add_argument("--output", default="christmas_tree_poster.png", metavar="FILE",
+                        help="PNG file, relative to the folder (default: christmas_tree_poster.png)")
+    poster.add_argument("--frame", type=int, default=0, metavar="N",
+                        help="animation frame to render (default: 0)")
+    poster.add_argument("--tile", type=parse_size, default=POSTER_TILE_SIZE, metavar="WxH",
+                        help="tile size; memory use grows with it (default: %dx%d)" % POSTER_TILE_SIZE)
+
+    commands.add_parser("benchmark", parents=[canvas],
+                        help="time start-up and renders of synthetic images over a matrix of "
+                             "canvas sizes, frame counts and ornament counts")
+
+    serve = commands.add_parser("serve", help="run the render service: an HTTP API with a job queue")
+    serve.add_argument("--host", default="127.0.0.1", help="address to listen on (default: 127.0.0.1)")
+    serve.add_argument("--port", type=int, default=8765, help="port to listen on (default: 8765)")
+    serve.add_argument("--workers", type=int, default=1, metavar="N",
+                       help="render jobs in N worker processes (0 = one per CPU core)")
+    serve.add_argument("--queue-size", type=int, default=SERVICE_QUEUE_SIZE, metavar="N",
+                       help="jobs that may wait before requests are refused (default: %d)"
+                            % SERVICE_QUEUE_SIZE)
+    serve.add_argument("--output-dir", metavar="DIR",
+                       help="folder for rendered animations (default: 'service' in the cache folder)")
+    serve.add_argument("--cache-dir", metavar="DIR",
+                       help="render cache folder, pruned to the %d MiB most recently used "
+                            "(default: $XMASTREE_CACHE_DIR or ~/.cache/stargazers-xmastree)"
+                            % (CACHE_MAX_BYTES >> 20))
+    serve.add_argument("--no-cache", action="store_true",
+                       help="always render, without reading or writing the render cache")
+    serve.set_defaults(frames=None, size=None, scale=None, profile=None)
+
+    submit = commands.add_parser("submit", parents=[canvas],
+                                 help="render a folder through a running render service")
+    submit.add_argument("folder", help="folder containing the JPG/PNG images")
+    submit.add_argument("--url", default="http://127.0.0.1:8765",
+                        help="render service address (default: http://127.0.0.1:8765)")
+    submit.add_argument("--output", default="christmas_tree.gif", metavar="FILE",
+                        help="where to save the animation; the extension selects the format "
+                             "(default: christmas_tree.gif)")
+    submit.add_argument("--sprite-levels", type=int_at_least(2), metavar="N",
+                        help="render lights and the star from a sprite atlas with N levels")
+    return parser
+
+
+def main(argv: list = None):
     """Main entry point."""
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if not argv or (argv[0] not in COMMANDS and argv[0] not in ('-h', '--help')):
+        argv.insert(0, 'render')
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if (getattr(args, 'output', None) == '-'
+            and output_format(args.output, args.format) not in STREAM_FORMATS):
+        parser.error(f"only {' and '.join(STREAM_FORMATS)} frame streams can be written to standard output")
+    if args.command == 'render' and args.watch and (args.spool or args.output == '-'):
+        parser.error("--watch rewrites its output file on every change and cannot be combined "
+                     "with --spool or --output -")
+    if args.command == 'poster':
+        num_frames = SCENE['frame_count'] if args.frames is None else args.frames
+        if not 0 <= args.frame < num_frames:
+            parser.error(f"--frame must be between 0 and {num_frames - 1} (the animation has "
+                         f"{num_frames} frames)")
+    if args.command == 'batch' and args.output == '-':
+        parser.error("batch renders write one file per folder and cannot share standard output")
+
+    missing = check_dependencies() if args.command != 'submit' else []
+    if missing:
+        print(f"❌ Missing required package(s): {', '.join(missing)}", file=sys.stderr)
+        print(f"   Install with: {sys.executable} -m pip install {' '.join(missing)}", file=sys.stderr)
+        sys.exit(2)
+
+    if getattr(args, 'output', None) == '-':
+        # Frames go to standard output; keep the progress report off it
+        with contextlib.redirect_stdout(sys.stderr):
+            return _main(args)
+    return _main(args)
+
+
+def _main(args: argparse.Namespace):
     print("🎄 Animated Christmas Tree Generator 🌟")
     print("   6 Levels • 21 Ornaments • Astronomical Theme")
     print("=" * 50)
 
-    if len(sys.argv) > 1:
-        folder_path = sys.argv[1]
+    if args.size:
+        size = args.size
+    elif args.scale:
+        size = scaled_canvas_size(args.scale)
     else:
-        folder_path = "."
+        size = None
+
+    profiler = StageProfiler()
+    start = time.perf_counter()
+    with profiling(profiler):
+        result = run_command(args, size)
 
-    folder_path = os.path.abspath(folder_path)
+    if args.profile:
+        if args.command == 'benchmark':
+            report = result
+        else:
+            report = {'wall_seconds': round(time.perf_counter() - start, 4),
+                      'peak_rss_mb': peak_rss_mb(), 'stages': profiler.report()}
+        text = json.dumps(report, indent=2)
+        if args.profile == '-':
+            print(text)
+        else:
+            with open(args.profile, 'w', encoding='utf-8') as fp:
+                fp.write(text + '\n')
+
+    return result
+
+
+def run_command(args: argparse.Namespace, size: tuple):
+    """Run the command selected on the command line."""
+    num_frames = SCENE['frame_count'] if args.frames is None else args.frames
+
+    if args.command == 'benchmark':
+        print("⏱️  Measuring start-up...")
+        startup = measure_startup()
+        print(f"   import {startup['import_ms']:.0f} ms, --help {startup['help_ms']:.0f} ms")
+        print("⏱️  Benchmarking on synthetic images...")
+        runs = run_benchmark(sizes=[size] if size else BENCHMARK_SIZES,
+                             frame_counts=[args.frames] if args.frames is not None else BENCHMARK_FRAME_COUNTS,
+                             backend=args.backend)
+        return {'startup': startup, 'runs': runs}
+
+    if args.command == 'submit':
+        request = {'frames': num_frames, 'backend': args.backend,
+                   'format': os.path.splitext(args.output)[1].lower().lstrip('.') or 'gif',
+                   'sprite_levels': args.sprite_levels}
+        if size:
+            request['size'] = list(size)
+        print(f"🛰️  Submitting {os.path.abspath(args.folder)} to {args.url}")
+        output_file = ServiceClient(args.url).render(args.folder, args.output, **request)
+        print(f"🎁 Christmas tree saved to: {output_file}")
+        return output_file
+
+    if args.command == 'poster':
+        return render_poster(os.path.abspath(args.folder), args.output, size=size or REFERENCE_SIZE,
+                             frame_num=args.frame, num_frames=num_frames, backend=args.backend,
+                             tile_size=args.tile)
+
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    cache = None if args.no_cache else RenderCache(args.cache_dir)
+
+    if args.command == 'serve':
+        try:
+            asyncio.run(serve(args.host, args.port, args.output_dir, workers=workers,
+                              queue_size=args.queue_size, cache=cache))
+        except KeyboardInterrupt:
+            print("\n👋 Render service stopped")
+        return None
+
+    size = size or REFERENCE_SIZE
+
+    if args.command == 'batch':
+        results = generate_batch(read_batch_folders(args.specs), args.output, workers=workers,
+                                 cache=cache, num_frames=num_frames, backend=args.backend, size=size,
+                                 sprite_levels=args.sprite_levels, threads=args.threads,
+                                 file_format=args.format)
+        print("\n🎅 Merry Christmas and clear skies for stargazing! 🔭")
+        return [output_file for _, output_file, _, error in results if error is None]
+
+    if args.export_timeline:
+        metadata = base_tree_metadata(build_scene(random.Random(SCENE_SEED)), *size)
+        timeline = AnimationTimeline(metadata, num_frames)
+        with open(args.export_timeline, 'w', encoding='utf-8') as fp:
+            json.dump(timeline.to_dict(), fp)
+        print(f"🗂️  Timeline of {num_frames} frames saved to: {args.export_timeline}")
+        return args.export_timeline
+
+    folder_path = os.path.abspath(args.folder)
     print(f"📁 Searching for images in: {folder_path}")
 
-    output_file = generate_christmas_tree_gif(folder_path)
+    if args.watch:
+        return watch_folder(folder_path, args.output, interval=args.interval, cache=cache,
+                            num_frames=num_frames, backend=args.backend, size=size, workers=workers,
+                            threads=args.threads, sprite_levels=args.sprite_levels,
+                            file_format=args.format)
+
+    output_file = generate_christmas_tree_gif(folder_path, args.output, workers=workers,
+                                              num_frames=num_frames, backend=args.backend, size=size,
+                                              cache=cache, sprite_levels=args.sprite_levels,
+                                              threads=args.threads, file_format=args.format,
+                                              spool_dir=args.spool, spool_compress=args.spool_compress)
 
     print("\n🎅 Merry Christmas and clear skies for stargazing! 🔭")
 
@@ -0,0 +1,57 @@
+"""The NumPy renderer must match the PIL renderer to within rounding."""
+
+import math
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import christmas_tree_animated as xmas  # noqa: E402
+
+np = pytest.importorskip('numpy')
+
+# Largest per-channel difference allowed between the backends (the star
+# glow is composited in floating point by the NumPy backend)
+TOLERANCE = 1
+
+FRAMES = (0, 3, 7, 12, 19)
+TOTAL_FRAMES = 20
+
+
+def max_difference(a, b):
+    assert a.mode == b.mode and a.size == b.size
+    return int(np.abs(np.asarray(a, dtype=np.int16) - np.asarray(b, dtype=np.int16)).max())
+
+
+@pytest.fixture(scope='module')
+def metadata():
+    return xmas.seeded_base_tree(*xmas.REFERENCE_SIZE)[1]
+
+
+@pytest.mark.parametrize('frame', FRAMES)
+def test_lights(metadata, frame):
+    width, height = xmas.REFERENCE_SIZE
+    layers = [xmas.create_animated_lights(width, height, frame, metadata['light_positions'], backend)
+              for backend in ('pil', 'numpy')]
+    assert max_difference(*layers) <= TOLERANCE
+
+
+@pytest.mark.parametrize('frame', FRAMES)
+def test_twinkling_stars(metadata, frame):
+    width, height = xmas.REFERENCE_SIZE
+    positions = metadata['star_positions'][:xmas.SCENE['twinkling_stars']]
+    phase = 2 * math.pi * frame / TOTAL_FRAMES
+    layers = [xmas.create_twinkling_stars(width, height, positions, phase, backend)
+              for backend in ('pil', 'numpy')]
+    assert max_difference(*layers) <= TOLERANCE
+
+
+@pytest.mark.parametrize('frame', FRAMES)
+@pytest.mark.parametrize('size', (12, 30, xmas.SCENE['star_size'], 250))
+def test_star_glow(size, frame):
+    # The star twinkles twice per loop
+    phase = 2 * 2 * math.pi * frame / TOTAL_FRAMES
+    stars = [xmas.create_star(size, phase, backend) for backend in ('pil', 'numpy')]
+    assert max_difference(*stars) <= TOLERANCE
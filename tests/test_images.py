@@ -0,0 +1,38 @@
+"""Ornament discovery must skip files this script wrote itself."""
+
+import contextlib
+import io
+import os
+import sys
+
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import christmas_tree_animated as xmas  # noqa: E402
+
+
+def test_skips_own_apng(tmp_path):
+    Image.new('RGB', (20, 20), 'red').save(tmp_path / 'photo.png')
+    with contextlib.redirect_stdout(io.StringIO()):
+        output_file = xmas.generate_christmas_tree_gif(str(tmp_path), 'tree.png', num_frames=2,
+                                                       size=(48, 64), file_format='apng')
+    with Image.open(output_file) as img:
+        assert img.info['Software'] == xmas.OUTPUT_SOFTWARE
+    assert xmas.find_images(str(tmp_path)) == [str(tmp_path / 'photo.png')]
+
+
+def test_keeps_other_pngs(tmp_path):
+    Image.new('RGB', (20, 20), 'red').save(tmp_path / 'a.png')
+    Image.new('RGB', (20, 20), 'blue').save(tmp_path / 'b.jpg')
+    assert xmas.find_images(str(tmp_path)) == [str(tmp_path / 'a.png'), str(tmp_path / 'b.jpg')]
+
+
+def test_skips_own_poster(tmp_path):
+    Image.new('RGB', (20, 20), 'red').save(tmp_path / 'photo.png')
+    with contextlib.redirect_stdout(io.StringIO()):
+        xmas.render_poster(str(tmp_path), size=(48, 64), tile_size=(32, 32))
+        assert xmas.find_images(str(tmp_path)) == [str(tmp_path / 'photo.png')]
+        # A second poster is still decorated with the photo only
+        xmas.render_poster(str(tmp_path), 'again.png', size=(48, 64))
+    assert xmas.find_images(str(tmp_path)) == [str(tmp_path / 'photo.png')]
@@ -0,0 +1,39 @@
+"""A poster rendered tile by tile must match the frame rendered whole."""
+
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+from PIL import Image, ImageChops
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import christmas_tree_animated as xmas  # noqa: E402
+
+SIZE = (300, 400)
+
+
+@pytest.fixture
+def photos(tmp_path):
+    for i, color in enumerate(('red', 'navy', 'gold')):
+        Image.new('RGB', (32, 24), color).save(tmp_path / f'photo{i}.png')
+    return tmp_path
+
+
+@pytest.mark.parametrize('backend', ['pil', 'numpy'])
+@pytest.mark.parametrize('tile_size', [(70, 50), (128, 400), (300, 96)])
+@pytest.mark.parametrize('with_photos', [True, False])
+def test_tiles_match_whole_frame(tmp_path, photos, backend, tile_size, with_photos):
+    folder = str(photos if with_photos else tmp_path / 'empty')
+    os.makedirs(folder, exist_ok=True)
+    output_file = str(tmp_path / 'poster.png')
+    with contextlib.redirect_stdout(io.StringIO()):
+        xmas.render_poster(folder, output_file, size=SIZE, frame_num=3, num_frames=20,
+                           backend=backend, tile_size=tile_size)
+        images = xmas.find_images(folder, limit=sum(xmas.SCENE['ornaments_per_row']))
+    base, metadata = xmas.seeded_base_tree(*SIZE, backend)
+    whole = xmas.generate_frame(base, metadata, 3, 20, None, images, not images, backend=backend)
+    with Image.open(output_file) as poster:
+        assert ImageChops.difference(whole, poster.convert('RGB')).getbbox() is None
@@ -0,0 +1,51 @@
+"""Render requests to the service API are validated before any work starts."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import christmas_tree_animated as xmas  # noqa: E402
+
+
+def test_defaults(tmp_path):
+    folder, options, extension = xmas.parse_job_request({'folder': str(tmp_path)})
+    assert folder == str(tmp_path)
+    assert options == {'num_frames': xmas.SCENE['frame_count'], 'backend': 'auto',
+                       'size': xmas.REFERENCE_SIZE, 'sprite_levels': None}
+    assert extension == '.gif'
+
+
+def test_options(tmp_path):
+    _, options, extension = xmas.parse_job_request({'folder': str(tmp_path), 'frames': 5, 'size': '300x400',
+                                                    'backend': 'pil', 'sprite_levels': 8, 'format': 'webp'})
+    assert options == {'num_frames': 5, 'backend': 'pil', 'size': (300, 400), 'sprite_levels': 8}
+    assert extension == '.webp'
+    _, options, _ = xmas.parse_job_request({'folder': str(tmp_path), 'size': [48, 64]})
+    assert options['size'] == (48, 64)
+
+
+@pytest.mark.parametrize('fields', [
+    {'frames': 0},
+    {'frames': 2.5},
+    {'frames': '5'},
+    {'frames': True},
+    {'sprite_levels': 1},
+    {'sprite_levels': True},
+    {'size': [True, 400]},
+    {'size': [300]},
+    {'size': '8x8'},
+    {'format': 'y4m'},
+    {'backend': 'opengl'},
+])
+def test_rejects_invalid_fields(tmp_path, fields):
+    with pytest.raises(ValueError):
+        xmas.parse_job_request({'folder': str(tmp_path), **fields})
+
+
+@pytest.mark.parametrize('data', [[], {}, {'folder': 3}, {'folder': '/no/such/folder'}])
+def test_rejects_invalid_folder(data):
+    with pytest.raises(ValueError):
+        xmas.parse_job_request(data)
@@ -0,0 +1,104 @@
+"""The Y4M and raw RGB frame streams must be readable by other programs."""
+
+import contextlib
+import io
+import os
+import sys
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import christmas_tree_animated as xmas  # noqa: E402
+
+SIZE = (24, 18)
+
+
+def make_frames(count, size=SIZE):
+    return [Image.new('RGB', size, (40 * i % 256, 255 - 30 * i % 256, 90)) for i in range(count)]
+
+
+def write_stream(path, frames, duration=100, durations=None, size=SIZE):
+    with xmas.open_animation_writer(str(path), size, duration, num_frames=len(frames)) as writer:
+        for i, frame in enumerate(frames):
+            writer.add_frame(frame, durations[i] if durations else None)
+    return path.read_bytes()
+
+
+def parse_y4m(data):
+    """Return the header parameters and the payloads of the frames of a Y4M stream."""
+    header, _, rest = data.partition(b'\n')
+    magic, *tokens = header.decode('ascii').split(' ')
+    assert magic == 'YUV4MPEG2'
+    params = {token[0]: token[1:] for token in tokens}
+    width, height = int(params['W']), int(params['H'])
+    frame_size = width * height * 3  # C444: three full planes
+    payloads = []
+    while rest:
+        marker, _, rest = rest.partition(b'\n')
+        assert marker == b'FRAME'
+        assert len(rest) >= frame_size
+        payloads.append(rest[:frame_size])
+        rest = rest[frame_size:]
+    return params, payloads
+
+
+def test_y4m_header(tmp_path):
+    params, _ = parse_y4m(write_stream(tmp_path / 'out.y4m', make_frames(1)))
+    assert (params['W'], params['H']) == (str(SIZE[0]), str(SIZE[1]))
+    assert params['F'] == '10:1'
+    assert params['I'] == 'p'
+    assert params['C'] == '444'
+    assert params['X'] == 'COLORRANGE=FULL'
+
+
+@pytest.mark.parametrize('duration, rate', [(100, '10:1'), (40, '25:1'), (30, '100:3'), (1000, '1:1')])
+def test_y4m_frame_rate(tmp_path, duration, rate):
+    params, _ = parse_y4m(write_stream(tmp_path / 'out.y4m', make_frames(1), duration))
+    assert params['F'] == rate
+
+
+def test_y4m_frames(tmp_path):
+    frames = make_frames(5)
+    params, payloads = parse_y4m(write_stream(tmp_path / 'out.y4m', frames))
+    assert len(payloads) == len(frames)
+    for frame, payload in zip(frames, payloads):
+        planes = frame.convert('YCbCr').split()
+        assert payload == b''.join(plane.tobytes() for plane in planes)
+
+
+def test_y4m_repeats_long_frames(tmp_path):
+    # Identical frames are kept, and a frame shown for 3 durations is written 3 times
+    frames = make_frames(1) * 2 + make_frames(2)[1:]
+    _, payloads = parse_y4m(write_stream(tmp_path / 'out.y4m', frames, durations=[100, 100, 300]))
+    assert len(payloads) == 5
+    assert payloads[0] == payloads[1] and payloads[2] == payloads[3] == payloads[4]
+
+
+def test_raw_rgb_length(tmp_path):
+    frames = make_frames(4)
+    data = write_stream(tmp_path / 'out.rgb', frames)
+    assert len(data) == SIZE[0] * SIZE[1] * 3 * len(frames)
+    assert data == b''.join(frame.tobytes() for frame in frames)
+
+
+def test_stdout_only_takes_streams():
+    with pytest.raises(ValueError):
+        xmas.open_animation_writer('-', SIZE, 100, file_format='gif')
+
+
+@pytest.mark.parametrize('output, file_format', [('tree.y4m', None), ('tree.out', 'rgb')])
+def test_rendered_stream(tmp_path, output, file_format):
+    size, num_frames = (48, 64), 3
+    with contextlib.redirect_stdout(io.StringIO()):
+        output_file = xmas.generate_christmas_tree_gif(str(tmp_path), output, num_frames=num_frames,
+                                                       size=size, file_format=file_format)
+    with open(output_file, 'rb') as fp:
+        data = fp.read()
+    if file_format == 'rgb':
+        assert len(data) == size[0] * size[1] * 3 * num_frames
+    else:
+        params, payloads = parse_y4m(data)
+        assert (int(params['W']), int(params['H'])) == size
+        assert len(payloads) == num_frames